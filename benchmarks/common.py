@@ -0,0 +1,65 @@
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Сводка по задержкам в миллисекундах и пропускной способности."""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / len(values), 3) if values else 0.0,
+            "p50": round(percentile(values, 0.50), 3),
+            "p90": round(percentile(values, 0.90), 3),
+            "p99": round(percentile(values, 0.99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        },
+    }
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+    }
+
+
+def write_results(path: str, report: dict) -> None:
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
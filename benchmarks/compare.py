@@ -0,0 +1,54 @@
+"""Сравнение двух JSON-отчетов бенчмарков.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+
+Код возврата 1, если p99 вырос или RPS упал больше чем на порог.
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Собирает сценарии из вложенных секций отчета в плоский словарь."""
+    flat = {}
+    for name, value in results.items():
+        if "latency_ms" in value:
+            flat[prefix + name] = value
+        else:
+            flat.update(flatten(value, f"{prefix}{name}."))
+    return flat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(args.current, encoding="utf-8") as f:
+        current = flatten(json.load(f)["results"])
+
+    regressed = False
+    print(f"{'scenario':45} {'p50 ms':>18} {'p99 ms':>18} {'rps':>18}")
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name], current[name]
+        p99_change = new["latency_ms"]["p99"] / old["latency_ms"]["p99"] - 1 if old["latency_ms"]["p99"] else 0
+        rps_change = new["rps"] / old["rps"] - 1 if old["rps"] else 0
+        flag = p99_change > args.threshold or rps_change < -args.threshold
+        regressed |= flag
+        print(
+            f"{name:45} "
+            f"{old['latency_ms']['p50']:>8} -> {new['latency_ms']['p50']:<8}"
+            f"{old['latency_ms']['p99']:>8} -> {new['latency_ms']['p99']:<8}"
+            f"{old['rps']:>8} -> {new['rps']:<8}"
+            f"{'  REGRESSION' if flag else ''}"
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Нагрузочный бенчмарк горячих путей API.
+
+По умолчанию приложение src.main:app поднимается в процессе поверх хранилищ в памяти;
+с --base-url нагрузка подается на запущенный сервер (например, с локальным Postgres).
+Данные засеиваются через публичный API, результаты пишутся в JSON.
+
+    python -m benchmarks.load --output results.json
+    python -m benchmarks.load --base-url http://localhost:8000 --concurrency 100
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import random
+import time
+from typing import Awaitable, Callable, List
+import httpx
+from benchmarks.common import summarize, run_metadata, write_results
+
+SCENARIOS = ("redirect", "stats", "links_keyset", "links_offset", "create")
+PASSWORD = "benchmark-password"
+
+
+def build_inmemory_app():
+    from src.main import app
+    from src.api.v1.dependencies import get_link_repository, get_user_repository, get_rate_limiter, get_redirect_service
+    from src.cache import link_cache
+    from src.services.click_queue import click_queue
+    from src.services.redirect_service import RedirectService
+    from benchmarks.memory_repository import InMemoryLinkRepository, InMemoryUserRepository, repository_factory
+
+    link_repository, user_repository = InMemoryLinkRepository(), InMemoryUserRepository()
+    redirect_service = RedirectService(link_cache, click_queue, repository_factory(link_repository))
+
+    # Переопределения асинхронные, чтобы не добавлять в замер переход в пул потоков
+    async def get_bench_link_repository():
+        return link_repository
+
+    async def get_bench_user_repository():
+        return user_repository
+
+    async def get_bench_redirect_service():
+        return redirect_service
+
+    async def get_no_rate_limiter():
+        # Нагрузка идет с одного адреса и от одного пользователя, лимиты частоты ее бы отсекли
+        return None
+
+    app.dependency_overrides[get_link_repository] = get_bench_link_repository
+    app.dependency_overrides[get_user_repository] = get_bench_user_repository
+    app.dependency_overrides[get_redirect_service] = get_bench_redirect_service
+    app.dependency_overrides[get_rate_limiter] = get_no_rate_limiter
+    return app
+
+
+async def run_load(
+    make_request: Callable[[], Awaitable[httpx.Response]], total: int, concurrency: int
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < total:
+            start = time.perf_counter()
+            try:
+                response = await make_request()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+class Benchmark:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.auth_headers: List[dict] = []
+        self.short_codes: List[str] = []
+        self.cursors: List[str] = []
+
+    def _headers(self) -> dict:
+        return random.choice(self.auth_headers)
+
+    async def _authenticate(self, username: str) -> dict:
+        if self.args.auth == "basic":
+            credentials = base64.b64encode(f"{username}:{PASSWORD}".encode()).decode()
+            return {"Authorization": f"Basic {credentials}"}
+        response = await self.client.post("/auth/token", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def seed(self) -> dict:
+        """Создает пользователей, ссылки и клики через API."""
+        prefix = f"bench-{int(time.time())}"
+        for index in range(self.args.users):
+            username = f"{prefix}-{index}"
+            response = await self.client.post("/auth/register", json={"username": username, "password": PASSWORD})
+            response.raise_for_status()
+            headers = await self._authenticate(username)
+            self.auth_headers.append(headers)
+            for start in range(0, self.args.links, 1000):
+                count = min(1000, self.args.links - start)
+                urls = [f"https://example.com/{prefix}/{index}/{start + i}" for i in range(count)]
+                response = await self.client.post("/links/bulk", json={"urls": urls}, headers=headers)
+                response.raise_for_status()
+                self.short_codes.extend(
+                    item["short_url"].rsplit("/", 1)[1]
+                    for item in response.json()["items"] if item["status"] == "created"
+                )
+
+        hot = self.short_codes[: max(1, len(self.short_codes) // 100)]
+        clicks = await run_load(
+            lambda: self.client.get(f"/{random.choice(hot)}"), self.args.clicks, self.args.concurrency
+        )
+
+        # Курсоры глубоких страниц для keyset-сценария
+        cursor = None
+        while len(self.cursors) < self.args.pages:
+            params = {"limit": self.args.page_size, **({"after": cursor} if cursor else {})}
+            response = await self.client.get("/links", params=params, headers=self.auth_headers[0])
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+            self.cursors.append(cursor)
+        return {"users": self.args.users, "links": len(self.short_codes), "clicks": clicks}
+
+    def scenario(self, name: str) -> Callable[[], Awaitable[httpx.Response]]:
+        hot = self.short_codes[: max(1, len(self.short_codes) // 100)]
+        if name == "redirect":
+            return lambda: self.client.get(f"/{random.choice(hot)}")
+        if name == "stats":
+            return lambda: self.client.get("/stats", headers=self._headers())
+        if name == "links_keyset":
+            return lambda: self.client.get(
+                "/links",
+                params={"limit": self.args.page_size, "after": random.choice(self.cursors)} if self.cursors
+                else {"limit": self.args.page_size},
+                headers=self.auth_headers[0],
+            )
+        if name == "links_offset":
+            return lambda: self.client.get(
+                "/links",
+                params={
+                    "limit": self.args.page_size,
+                    "offset": random.randrange(max(1, len(self.cursors))) * self.args.page_size,
+                },
+                headers=self.auth_headers[0],
+            )
+        if name == "create":
+            return lambda: self.client.post(
+                "/create_short_url",
+                json={"original_url": f"https://example.com/create/{random.random()}"},
+                headers=self._headers(),
+            )
+        raise ValueError(f"Unknown scenario: {name}")
+
+
+async def main(args) -> dict:
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        transport, base_url = httpx.ASGITransport(app=build_inmemory_app()), "http://bench"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=30) as client:
+        benchmark = Benchmark(client, args)
+        report = {"meta": run_metadata(args), "seed": await benchmark.seed(), "results": {}}
+        for name in args.scenarios:
+            await run_load(benchmark.scenario(name), min(args.requests, 100), args.concurrency)  # прогрев
+            report["results"][name] = await run_load(benchmark.scenario(name), args.requests, args.concurrency)
+        return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="адрес запущенного сервиса; по умолчанию приложение в памяти")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="запросов на сценарий")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--links", type=int, default=2000, help="ссылок на пользователя")
+    parser.add_argument("--clicks", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=100, help="глубина страниц для пагинации")
+    parser.add_argument("--auth", choices=("bearer", "basic"), default="bearer")
+    parser.add_argument("--output", default="-", help="путь к JSON-файлу результатов или - для stdout")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    write_results(arguments.output, asyncio.run(main(arguments)))
@@ -0,0 +1,283 @@
+import itertools
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+from src.models.click_bucket import SERIES_BUCKETS
+from src.repositories.interfaces.links_repository import LinkRepositoryInterface
+from src.repositories.interfaces.users_repository import UserRepositoryInterface
+
+
+class InMemoryLinkRepository(LinkRepositoryInterface):
+    """Хранилище ссылок в памяти для бенчмарков без Postgres."""
+
+    def __init__(self):
+        self.links: dict = {}
+        self.by_id: dict = {}
+        self.clicks: List[Tuple[int, datetime]] = []
+        self._ids = itertools.count(1)
+        self._blocks = itertools.count(1)
+
+    def _insert(
+        self, original_url: str, short_url: str, expires_at: datetime, user_id: int,
+        url_hash: Optional[bytes] = None, redirect_type: int = 307
+    ) -> dict:
+        link = {
+            "id": next(self._ids),
+            "original_url": original_url,
+            "short_url": short_url,
+            "is_active": True,
+            "created_at": datetime.now(),
+            "expires_at": expires_at,
+            "click_count": 0,
+            "user_id": user_id,
+            "url_hash": url_hash,
+            "redirect_type": redirect_type,
+        }
+        self.links[short_url] = link
+        self.by_id[link["id"]] = link
+        return link
+
+    async def create(
+        self, original_url: str, short_url: str, expires_at: datetime, user_id: int, redirect_type: int = 307
+    ) -> dict:
+        if short_url in self.links:
+            raise ValueError("Short URL already exists")
+        return dict(self._insert(original_url, short_url, expires_at, user_id, redirect_type=redirect_type))
+
+    def _active_by_hash(self, user_id: int, url_hash: bytes) -> Optional[dict]:
+        now = datetime.now()
+        for link in self.by_id.values():
+            if link["user_id"] == user_id and link["url_hash"] == url_hash and link["is_active"]:
+                if link["expires_at"] is None or link["expires_at"] >= now:
+                    return link
+                link["is_active"] = False
+        return None
+
+    async def create_deduplicated(
+        self, original_url: str, url_hash: bytes, short_url: str, expires_at: datetime, user_id: int,
+        redirect_type: int = 307
+    ) -> Tuple[dict, bool]:
+        existing = self._active_by_hash(user_id, url_hash)
+        if existing is not None:
+            return dict(existing), False
+        if short_url in self.links:
+            raise ValueError("Short URL already exists")
+        return dict(self._insert(original_url, short_url, expires_at, user_id, url_hash, redirect_type)), True
+
+    async def create_many(
+        self, links: List[Tuple[str, str]], expires_at: datetime, user_id: int,
+        url_hashes: Optional[List[bytes]] = None
+    ) -> List[dict]:
+        created = []
+        for index, (original_url, short_url) in enumerate(links):
+            url_hash = url_hashes[index] if url_hashes is not None else None
+            if short_url in self.links or (url_hash is not None and self._active_by_hash(user_id, url_hash)):
+                continue
+            created.append(dict(self._insert(original_url, short_url, expires_at, user_id, url_hash)))
+        return created
+
+    async def get_by_url_hashes(self, user_id: int, url_hashes: List[bytes]) -> List[dict]:
+        hashes = set(url_hashes)
+        return [
+            {"short_url": link["short_url"], "url_hash": link["url_hash"], "expires_at": link["expires_at"]}
+            for link in self.by_id.values()
+            if link["user_id"] == user_id and link["url_hash"] in hashes and link["is_active"]
+        ]
+
+    async def lease_code_block(self) -> int:
+        return next(self._blocks)
+
+    async def get_by_short_url(self, short_url: str, user_id: Optional[int] = None) -> Optional[dict]:
+        link = self.links.get(short_url)
+        if link is None or (user_id is not None and link["user_id"] != user_id):
+            return None
+        return dict(link)
+
+    async def get_public_link(self, short_url: str) -> Optional[dict]:
+        link = self.links.get(short_url)
+        if link is None:
+            return None
+        return {field: link[field] for field in ("id", "original_url", "expires_at", "is_active", "redirect_type")}
+
+    async def estimate_link_count(self) -> int:
+        return len(self.links)
+
+    async def stream_short_urls(
+        self, created_since: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[Tuple[str, datetime]]]:
+        codes = [
+            (link["short_url"], link["created_at"]) for link in self.by_id.values()
+            if created_since is None or link["created_at"] >= created_since
+        ]
+        for start in range(0, len(codes), batch_size):
+            yield codes[start:start + batch_size]
+
+    def _is_active(self, link: dict, now: datetime) -> bool:
+        return link["is_active"] and (link["expires_at"] is None or link["expires_at"] >= now)
+
+    async def get_all(
+        self, is_active: Optional[bool], limit: int, offset: int, user_id: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[dict]:
+        now = datetime.now()
+        links = [
+            link for link in self.by_id.values()
+            if link["user_id"] == user_id
+            and (is_active is None or self._is_active(link, now) == is_active)
+            and (after is None or (link["created_at"], link["id"]) < after)
+        ]
+        links.sort(key=lambda link: (link["created_at"], link["id"]), reverse=True)
+        return [dict(link) for link in links[offset:offset + limit]]
+
+    async def stream_links(
+        self, user_id: int, is_active: Optional[bool], batch_size: int
+    ) -> AsyncIterator[List[dict]]:
+        now = datetime.now()
+        links = [
+            dict(link) for link in self.by_id.values()
+            if link["user_id"] == user_id and (is_active is None or self._is_active(link, now) == is_active)
+        ]
+        for start in range(0, len(links), batch_size):
+            yield links[start:start + batch_size]
+
+    async def stream_clicks(
+        self, user_id: int, since: Optional[datetime], until: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[dict]]:
+        clicks = [
+            {"short_url": self.by_id[link_id]["short_url"], "clicked_at": clicked_at}
+            for link_id, clicked_at in sorted(self.clicks, key=lambda click: click[1])
+            if self.by_id[link_id]["user_id"] == user_id
+            and (since is None or clicked_at >= since) and (until is None or clicked_at < until)
+        ]
+        for start in range(0, len(clicks), batch_size):
+            yield clicks[start:start + batch_size]
+
+    async def deactivate(self, short_url: str, user_id: int) -> bool:
+        link = self.links.get(short_url)
+        if link is None or link["user_id"] != user_id or not link["is_active"]:
+            return False
+        link["is_active"] = False
+        return True
+
+    async def log_click(self, link_id: int) -> None:
+        await self.log_clicks([(link_id, datetime.now())])
+
+    async def log_clicks(self, clicks: List[Tuple[int, datetime]]) -> None:
+        self.clicks.extend(clicks)
+        for link_id, count in Counter(link_id for link_id, _ in clicks).items():
+            self.by_id[link_id]["click_count"] += count
+
+    async def get_stats(self, is_active: Optional[bool], user_id: int, primary: bool = False) -> List[dict]:
+        now = datetime.now()
+        hour_ago, day_ago = now - timedelta(hours=1), now - timedelta(hours=24)
+        stats = {
+            link["id"]: {
+                "id": link["id"],
+                "short_url": link["short_url"],
+                "original_url": link["original_url"],
+                "is_active": link["is_active"],
+                "expires_at": link["expires_at"],
+                "last_hour_clicks": 0,
+                "last_day_clicks": 0,
+            }
+            for link in self.by_id.values()
+            if link["user_id"] == user_id and (is_active is None or self._is_active(link, now) == is_active)
+        }
+        for link_id, clicked_at in self.clicks:
+            stat = stats.get(link_id)
+            if stat is not None and clicked_at >= day_ago:
+                stat["last_day_clicks"] += 1
+                stat["last_hour_clicks"] += clicked_at >= hour_ago
+        return sorted(
+            stats.values(), key=lambda stat: (stat["last_day_clicks"], stat["last_hour_clicks"]), reverse=True
+        )
+
+    async def get_click_series(self, link_id: int, bucket: str, start: datetime, end: datetime) -> List[dict]:
+        step = SERIES_BUCKETS[bucket]
+        counts = Counter(
+            start + (clicked_at - start) // step * step
+            for click_link_id, clicked_at in self.clicks
+            if click_link_id == link_id and start <= clicked_at < end
+        )
+        points, current = [], start
+        while current < end:
+            points.append({"bucket_start": current, "clicks": counts[current]})
+            current += step
+        return points
+
+    async def get_top_links(
+        self, user_id: int, start: datetime, end: datetime, limit: int, bucket: str = "minute"
+    ) -> List[dict]:
+        counts = Counter(
+            link_id for link_id, clicked_at in self.clicks
+            if self.by_id[link_id]["user_id"] == user_id and start <= clicked_at < end
+        )
+        return [
+            {
+                "short_url": self.by_id[link_id]["short_url"],
+                "original_url": self.by_id[link_id]["original_url"],
+                "clicks": clicks,
+            }
+            for link_id, clicks in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        ]
+
+    async def get_hot_links(self, since: datetime, limit: int) -> List[dict]:
+        now = datetime.now()
+        counts = Counter(
+            link_id for link_id, clicked_at in self.clicks
+            if clicked_at >= since and self._is_active(self.by_id[link_id], now)
+        )
+        return [
+            {
+                field: self.by_id[link_id][field]
+                for field in ("short_url", "id", "original_url", "expires_at", "is_active", "redirect_type")
+            }
+            for link_id, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        ]
+
+    async def prune_click_history(self, raw_before: datetime, minute_before: datetime, batch_size: int) -> int:
+        kept = [click for click in self.clicks if click[1] >= raw_before]
+        deleted, self.clicks = len(self.clicks) - len(kept), kept
+        return deleted
+
+    async def create_click_partition(self, name: str, start: datetime, end: datetime) -> None:
+        pass
+
+    async def list_click_partitions(self) -> List[str]:
+        return []
+
+    async def drop_click_partition(self, name: str) -> None:
+        pass
+
+    async def update_expired_links(self, batch_size: int) -> int:
+        now, updated = datetime.now(), 0
+        for link in self.by_id.values():
+            if link["is_active"] and link["expires_at"] is not None and link["expires_at"] < now:
+                link["is_active"] = False
+                updated += 1
+        return updated
+
+
+class InMemoryUserRepository(UserRepositoryInterface):
+    def __init__(self):
+        self.users: dict = {}
+
+    async def create(self, username: str, password_hash: str) -> dict:
+        if username in self.users:
+            raise ValueError(f"User {username} already exists")
+        user = {"id": len(self.users) + 1, "username": username, "password_hash": password_hash}
+        self.users[username] = user
+        return dict(user)
+
+    async def get_by_username(self, username: str) -> dict:
+        user = self.users.get(username)
+        return dict(user) if user else None
+
+
+def repository_factory(link_repository: InMemoryLinkRepository):
+    """Фабрика репозиториев для RedirectService, всегда отдающая одно хранилище в памяти."""
+    @asynccontextmanager
+    async def open_repository(read_only: bool):
+        yield link_repository
+    return open_repository
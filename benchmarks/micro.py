@@ -0,0 +1,148 @@
+"""Микробенчмарки LinkService и запросов LinkRepository.
+
+Сервис измеряется поверх хранилища в памяти. Для репозитория по умолчанию измеряется
+построение и компиляция SQL; с --db запросы выполняются на базе из настроек (.env).
+
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --db
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+from sqlalchemy.dialects import postgresql
+from benchmarks.common import summarize, run_metadata, write_results
+from benchmarks.memory_repository import InMemoryLinkRepository
+
+
+async def measure(func: Callable[[], Awaitable], iterations: int) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, 0, time.perf_counter() - start)
+
+
+class CompilingSession:
+    """Подменяет сессию: компилирует запросы репозитория в SQL без обращения к базе данных."""
+
+    dialect = postgresql.asyncpg.dialect()
+
+    class _Result:
+        rowcount = 0
+
+        def scalar_one_or_none(self):
+            return None
+
+        def first(self):
+            return None
+
+        def scalars(self):
+            return self
+
+        def all(self):
+            return []
+
+        def __iter__(self):
+            return iter(())
+
+    async def execute(self, statement, *args, **kwargs):
+        statement.compile(dialect=self.dialect)
+        return self._Result()
+
+    async def scalar(self, statement, *args, **kwargs):
+        statement.compile(dialect=self.dialect)
+        return 1
+
+    def add(self, instance):
+        pass
+
+    async def commit(self):
+        pass
+
+
+async def service_benchmarks(args) -> dict:
+    from src.cache.memory import MemoryCache
+    from src.services.links_service import LinkService
+    from src.services.rate_limiter import TokenBuckets
+    from src.services.stats_snapshots import StatsSnapshots
+
+    repository = InMemoryLinkRepository()
+    user = {"id": 1, "username": "bench"}
+    cached = LinkService(repository, MemoryCache(args.links, 60))
+    uncached = LinkService(repository)
+    snapshotted = LinkService(repository, stats_snapshots=StatsSnapshots(60, args.links))
+    short_urls = await cached.create_short_urls([f"https://example.com/{i}" for i in range(args.links)], user)
+    code = short_urls[0].rsplit("/", 1)[1]
+    buckets = TokenBuckets(1e9, 10 ** 9, args.links)
+
+    async def acquire():
+        buckets.acquire(("127.0.0.1", code))
+
+    await repository.log_clicks([(1, repository.by_id[1]["created_at"])] * args.clicks)
+
+    return {
+        "get_by_short_url_public_cached": await measure(lambda: cached.get_by_short_url_public(code), args.iterations),
+        "get_by_short_url_public_uncached": await measure(
+            lambda: uncached.get_by_short_url_public(code), args.iterations
+        ),
+        "create_short_url": await measure(lambda: cached.create_short_url("https://example.com/x", user), args.iterations),
+        "get_all_links": await measure(lambda: cached.get_all_links(True, 10, 0, user), args.iterations // 10),
+        "get_stats": await measure(lambda: cached.get_stats(None, user), args.iterations // 100 or 1),
+        "get_stats_snapshot": await measure(lambda: snapshotted.get_stats(None, user), args.iterations),
+        "rate_limit_acquire": await measure(acquire, args.iterations),
+    }
+
+
+def repository_calls(repository) -> dict:
+    from datetime import datetime
+    return {
+        "get_by_short_url": lambda: repository.get_by_short_url("abc123"),
+        "get_public_link": lambda: repository.get_public_link("abc123"),
+        "get_all": lambda: repository.get_all(True, 10, 0, 1),
+        "get_all_keyset": lambda: repository.get_all(True, 10, 0, 1, (datetime.now(), 1)),
+        "get_stats": lambda: repository.get_stats(None, 1),
+    }
+
+
+async def repository_benchmarks(args) -> dict:
+    from src.repositories.links_repository import LinkRepository
+
+    if not args.db:
+        calls = repository_calls(LinkRepository(CompilingSession()))
+        return {name: await measure(call, args.iterations) for name, call in calls.items()}
+
+    from src.db.database import async_session, engine
+    results = {}
+    async with async_session() as session:
+        for name, call in repository_calls(LinkRepository(session)).items():
+            results[name] = await measure(call, args.iterations // 10 or 1)
+    await engine.dispose()
+    return results
+
+
+async def main(args) -> dict:
+    return {
+        "meta": run_metadata(args),
+        "results": {
+            "service": await service_benchmarks(args),
+            "repository": await repository_benchmarks(args),
+        },
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--links", type=int, default=1000)
+    parser.add_argument("--clicks", type=int, default=10000)
+    parser.add_argument("--db", action="store_true", help="выполнять запросы репозитория на базе из настроек")
+    parser.add_argument("--output", default="-")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    write_results(arguments.output, asyncio.run(main(arguments)))
@@ -0,0 +1,148 @@
+"""Сравнение обработчика редиректа с прежним маршрутом через LinkService.
+
+Оба обработчика вызываются напрямую как ASGI-приложения поверх хранилища в памяти,
+без HTTP-клиента. Прежний маршрут, как и в приложении, на каждый запрос открывает
+репозиторий через зависимость-генератор; новый - только при промахе кэша.
+Новый маршрут проверяет лимиты частоты с заведомо недостижимыми значениями,
+так что в замер входит стоимость самой проверки. Переопределения зависимостей
+асинхронные, чтобы не добавлять переход в пул потоков.
+
+    python -m benchmarks.redirect --output redirect.json
+"""
+import argparse
+import asyncio
+import time
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import RedirectResponse
+from benchmarks.common import summarize, run_metadata, write_results
+from benchmarks.memory_repository import InMemoryLinkRepository, repository_factory
+
+USER = {"id": 1, "username": "bench"}
+
+
+def build_legacy_app(link_repository, link_cache) -> FastAPI:
+    """Маршрут редиректа в прежнем виде: граф зависимостей и ValueError для 404/410."""
+    from src.api.v1.dependencies import get_link_service
+    from src.services.links_service import LinkService
+
+    app = FastAPI()
+    open_repository = repository_factory(link_repository)
+
+    async def get_legacy_link_service():
+        async with open_repository(True) as repository:
+            yield LinkService(repository, link_cache)
+
+    app.dependency_overrides[get_link_service] = get_legacy_link_service
+
+    @app.get("/{short_url}")
+    async def redirect_url(short_url: str, request: Request, link_service: LinkService = Depends(get_link_service)):
+        try:
+            link = await link_service.get_by_short_url_public(short_url)
+            await link_service.log_click(short_url)
+            if "application/json" in request.headers.get("accept", ""):
+                return {"original_url": link["original_url"]}
+            return RedirectResponse(url=link["original_url"], status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        except ValueError as e:
+            status_code = 404 if "not found" in str(e).lower() else 410
+            raise HTTPException(status_code=status_code, detail=str(e))
+
+    return app
+
+
+def build_fast_app(link_repository, link_cache) -> FastAPI:
+    from src.api.v1.dependencies import get_rate_limiter, get_redirect_service
+    from src.api.v1.links import redirect_url
+    from src.services.rate_limiter import RateLimiter, TokenBuckets
+    from src.services.redirect_service import RedirectService
+
+    app = FastAPI()
+    app.add_api_route("/{short_url}", redirect_url, methods=["GET"])
+    redirect_service = RedirectService(link_cache, None, repository_factory(link_repository))
+
+    async def get_bench_redirect_service():
+        return redirect_service
+
+    app.dependency_overrides[get_redirect_service] = get_bench_redirect_service
+    rate_limiter = RateLimiter({scope: TokenBuckets(1e9, 10 ** 9, 100000) for scope in ("redirect", "alias")})
+
+    async def get_bench_rate_limiter():
+        return rate_limiter
+
+    app.dependency_overrides[get_rate_limiter] = get_bench_rate_limiter
+    return app
+
+
+async def call(app, path: str, headers: list) -> int:
+    """Один запрос к ASGI-приложению; возвращает код ответа."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "server": ("bench", 80), "client": ("127.0.0.1", 0),
+    }
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def measure(app, path: str, headers: list, expected: int, iterations: int) -> dict:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        errors += await call(app, path, headers) != expected
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def main(args) -> dict:
+    from src.cache.memory import MemoryCache
+    from src.services.links_service import LinkService
+
+    link_repository = InMemoryLinkRepository()
+    short_urls = await LinkService(link_repository).create_short_urls(
+        [f"https://example.com/{i}" for i in range(args.links)], USER
+    )
+    code = short_urls[0].rsplit("/", 1)[1]
+    inactive = short_urls[1].rsplit("/", 1)[1]
+    await link_repository.deactivate(inactive, USER["id"])
+
+    json_accept = [(b"accept", b"application/json")]
+    cases = {
+        "redirect_cached": (f"/{code}", [], 307, True),
+        "redirect_uncached": (f"/{code}", [], 307, False),
+        "json_cached": (f"/{code}", json_accept, 200, True),
+        "not_found": ("/missing", [], 404, True),
+        "inactive": (f"/{inactive}", [], 410, True),
+    }
+    results = {}
+    for name, (path, headers, expected, cached) in cases.items():
+        results[name] = {}
+        for handler, build in (("legacy", build_legacy_app), ("fast", build_fast_app)):
+            app = build(link_repository, MemoryCache(args.links if cached else 0, 60))
+            await measure(app, path, headers, expected, min(args.iterations, 100))  # прогрев
+            results[name][handler] = await measure(app, path, headers, expected, args.iterations)
+        legacy, fast = results[name]["legacy"]["latency_ms"]["mean"], results[name]["fast"]["latency_ms"]["mean"]
+        results[name]["speedup"] = round(legacy / fast, 2) if fast else None
+    return {"meta": run_metadata(args), "results": results}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--links", type=int, default=1000)
+    parser.add_argument("--output", default="-")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    write_results(arguments.output, asyncio.run(main(arguments)))
@@ -0,0 +1,4 @@
+#!/bin/bash
+# Разрешает потоковую репликацию для реплики из профиля replica в docker-compose
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,45 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-06-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String, nullable=False),
+    )
+    op.create_table(
+        "links",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("original_url", sa.String, nullable=False),
+        sa.Column("short_url", sa.String(10), nullable=False, unique=True),
+        sa.Column("is_active", sa.Boolean),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime, nullable=True),
+        sa.Column("click_count", sa.Integer),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    )
+    op.create_table(
+        "clicks",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("link_id", sa.Integer, sa.ForeignKey("links.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("clicked_at", sa.DateTime, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("clicks")
+    op.drop_table("links")
+    op.drop_table("users")
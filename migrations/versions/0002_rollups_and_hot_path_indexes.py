@@ -0,0 +1,63 @@
+"""click rollups, short code blocks and hot path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-06-20
+
+IF NOT EXISTS позволяет применить миграцию к базе, где часть объектов
+уже создана прежним create_all при старте приложения.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("click_buckets_minute", "click_buckets_hour"):
+        op.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                link_id INTEGER NOT NULL REFERENCES links (id) ON DELETE CASCADE,
+                bucket_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                clicks INTEGER NOT NULL,
+                PRIMARY KEY (link_id, bucket_start)
+            )
+        """)
+    # Бакеты заполняются по уже накопленным кликам, только если они еще пусты
+    for table, unit in (("click_buckets_minute", "minute"), ("click_buckets_hour", "hour")):
+        op.execute(f"""
+            INSERT INTO {table} (link_id, bucket_start, clicks)
+            SELECT link_id, date_trunc('{unit}', clicked_at), count(*)
+            FROM clicks
+            WHERE clicked_at IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table})
+            GROUP BY 1, 2
+        """)
+    op.execute("CREATE SEQUENCE IF NOT EXISTS short_code_blocks")
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_links_user_id_created_at_id "
+        "ON links (user_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_links_expires_at_active "
+        "ON links (expires_at) WHERE is_active"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_clicks_link_id_clicked_at ON clicks (link_id, clicked_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_clicks_clicked_at ON clicks (clicked_at)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_click_buckets_minute_bucket_start "
+        "ON click_buckets_minute (bucket_start)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_click_buckets_minute_bucket_start")
+    op.execute("DROP INDEX IF EXISTS ix_clicks_clicked_at")
+    op.execute("DROP INDEX IF EXISTS ix_clicks_link_id_clicked_at")
+    op.execute("DROP INDEX IF EXISTS ix_links_expires_at_active")
+    op.execute("DROP INDEX IF EXISTS ix_links_user_id_created_at_id")
+    op.execute("DROP SEQUENCE IF EXISTS short_code_blocks")
+    op.execute("DROP TABLE IF EXISTS click_buckets_hour")
+    op.execute("DROP TABLE IF EXISTS click_buckets_minute")
@@ -0,0 +1,84 @@
+"""partition clicks by clicked_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-06-27
+
+Таблица clicks пересоздается как секционированная по диапазонам clicked_at.
+Переносятся только клики в пределах окна хранения: более старые все равно
+удалила бы фоновая задача. Будущие секции создает задача click-retention.
+"""
+from datetime import datetime, timedelta
+from alembic import op
+from src.core.config import settings
+from src.db.partitions import partition_ranges, partition_start, next_partition_start
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _create_partition(name: str, start: datetime, end: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE {name} PARTITION OF clicks "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{end:%Y-%m-%d %H:%M:%S}')"
+    )
+
+
+def upgrade() -> None:
+    interval = settings.CLICK_PARTITION_INTERVAL
+    now = datetime.now()
+    start = partition_start(now - timedelta(days=settings.CLICK_RETENTION_DAYS), interval)
+    end = partition_start(now, interval)
+    for _ in range(settings.CLICK_PARTITIONS_AHEAD + 1):
+        end = next_partition_start(end, interval)
+
+    op.execute("DROP INDEX IF EXISTS ix_clicks_link_id_clicked_at")
+    op.execute("DROP INDEX IF EXISTS ix_clicks_clicked_at")
+    op.execute("ALTER TABLE clicks RENAME TO clicks_legacy")
+    op.execute("ALTER TABLE clicks_legacy RENAME CONSTRAINT clicks_pkey TO clicks_legacy_pkey")
+    op.execute("ALTER SEQUENCE clicks_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE clicks (
+            id INTEGER NOT NULL DEFAULT nextval('clicks_id_seq'),
+            link_id INTEGER NOT NULL REFERENCES links (id) ON DELETE CASCADE,
+            clicked_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, clicked_at)
+        ) PARTITION BY RANGE (clicked_at)
+    """)
+    op.execute("ALTER SEQUENCE clicks_id_seq OWNED BY clicks.id")
+    for name, lower, upper in partition_ranges("clicks", start, end, interval):
+        _create_partition(name, lower, upper)
+    # Страховка на случай, если задача не успела создать секцию заранее
+    op.execute("CREATE TABLE clicks_default PARTITION OF clicks DEFAULT")
+
+    op.execute(f"""
+        INSERT INTO clicks (id, link_id, clicked_at)
+        SELECT id, link_id, clicked_at FROM clicks_legacy
+        WHERE clicked_at >= '{start:%Y-%m-%d %H:%M:%S}'
+    """)
+    op.execute("DROP TABLE clicks_legacy")
+    op.execute("CREATE INDEX ix_clicks_link_id_clicked_at ON clicks (link_id, clicked_at)")
+    op.execute("CREATE INDEX ix_clicks_clicked_at ON clicks (clicked_at)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE clicks RENAME TO clicks_partitioned")
+    op.execute("ALTER TABLE clicks_partitioned RENAME CONSTRAINT clicks_pkey TO clicks_partitioned_pkey")
+    op.execute("ALTER SEQUENCE clicks_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_clicks_link_id_clicked_at")
+    op.execute("DROP INDEX IF EXISTS ix_clicks_clicked_at")
+    op.execute("""
+        CREATE TABLE clicks (
+            id INTEGER PRIMARY KEY DEFAULT nextval('clicks_id_seq'),
+            link_id INTEGER NOT NULL REFERENCES links (id) ON DELETE CASCADE,
+            clicked_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("ALTER SEQUENCE clicks_id_seq OWNED BY clicks.id")
+    op.execute("INSERT INTO clicks (id, link_id, clicked_at) SELECT id, link_id, clicked_at FROM clicks_partitioned")
+    op.execute("DROP TABLE clicks_partitioned")
+    op.execute("CREATE INDEX ix_clicks_link_id_clicked_at ON clicks (link_id, clicked_at)")
+    op.execute("CREATE INDEX ix_clicks_clicked_at ON clicks (clicked_at)")
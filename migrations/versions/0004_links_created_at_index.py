@@ -0,0 +1,20 @@
+"""links created_at index for the short code filter
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-07-02
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_links_created_at ON links (created_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_links_created_at")
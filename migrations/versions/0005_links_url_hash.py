@@ -0,0 +1,28 @@
+"""links url hash for per-user deduplication
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-07-08
+
+Хеш заполняется только для ссылок, созданных с дедупликацией, поэтому
+существующие строки не пересчитываются.
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE links ADD COLUMN IF NOT EXISTS url_hash BYTEA")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_links_user_id_url_hash_active "
+        "ON links (user_id, url_hash) WHERE is_active AND url_hash IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ux_links_user_id_url_hash_active")
+    op.execute("ALTER TABLE links DROP COLUMN IF EXISTS url_hash")
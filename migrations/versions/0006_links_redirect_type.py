@@ -0,0 +1,20 @@
+"""links redirect type
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-07-14
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE links ADD COLUMN IF NOT EXISTS redirect_type SMALLINT NOT NULL DEFAULT 307")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE links DROP COLUMN IF EXISTS redirect_type")
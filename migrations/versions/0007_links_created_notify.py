@@ -0,0 +1,43 @@
+"""notify on links insert
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-07-21
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Уведомление уходит при фиксации транзакции; коды пачками, чтобы не превысить 8000 байт на сообщение
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_links_created() RETURNS trigger AS $$
+        DECLARE
+            chunk text;
+        BEGIN
+            FOR chunk IN
+                SELECT string_agg(short_url, ',')
+                FROM (SELECT short_url, (row_number() OVER () - 1) / 500 AS grp FROM new_links) numbered
+                GROUP BY grp
+            LOOP
+                PERFORM pg_notify('links_created', chunk);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER links_created_notify
+        AFTER INSERT ON links
+        REFERENCING NEW TABLE AS new_links
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_links_created()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS links_created_notify ON links")
+    op.execute("DROP FUNCTION IF EXISTS notify_links_created()")
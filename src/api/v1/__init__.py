@@ -1,10 +1,16 @@
 from src.api.v1.auth import router as auth_router
+from src.api.v1.health import router as health_router
+from src.api.v1.metrics import router as metrics_router
 from src.api.v1.links import router as users_router
 from fastapi import APIRouter
 from fastapi.responses import RedirectResponse
 
 main_router = APIRouter()
 main_router.include_router(auth_router)
+# Служебные маршруты регистрируются до /{short_url}, иначе их перехватит редирект;
+# генератор не выдает коды, совпадающие с их путями (RESERVED_SHORT_CODES)
+main_router.include_router(health_router)
+main_router.include_router(metrics_router)
 main_router.include_router(users_router)
 
 
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from src.api.v1.dependencies import get_auth_service
+from src.api.v1.dependencies import get_auth_service, get_token_service
 from src.services.auth_service import AuthService
-from src.schemas.user import RegisterUserRequest, RegisterUserResponse
+from src.services.token_service import TokenService
+from src.schemas.user import RegisterUserRequest, RegisterUserResponse, TokenRequest, TokenResponse
 
 router = APIRouter()
 
@@ -18,3 +19,17 @@ async def register_user(
     except ValueError as e:
         status_code = 409 if "already exists" in str(e).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(e))
+
+
+@router.post("/auth/token", tags=["Auth"], response_model=TokenResponse)
+async def issue_token(
+    request: TokenRequest,
+    auth_service: AuthService = Depends(get_auth_service),
+    token_service: TokenService = Depends(get_token_service)
+):
+    """Выдача bearer-токена доступа по логину и паролю."""
+    try:
+        user = await auth_service.authenticate_user(request.username, request.password)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    return token_service.create_access_token(user)
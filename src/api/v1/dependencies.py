@@ -1,16 +1,37 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from typing import Annotated
+import math
+from contextlib import asynccontextmanager
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
+from typing import Annotated, AsyncIterator, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.services.links_service import LinkService
+from src.services.redirect_service import RedirectService, link_filter, open_link_repository, redirect_service
 from src.services.auth_service import AuthService
+from src.services.token_service import TokenService
 from src.repositories.links_repository import LinkRepository
 from src.repositories.users_repository import UserRepository
-from src.db.database import get_async_session
+from src.db.database import get_async_session, async_session, replica_router
+from src.cache import link_cache, credentials_cache
+from src.services.click_queue import click_queue
+from src.services.stats_snapshots import stats_snapshots
+from src.services.rate_limiter import RateLimiter, rate_limiter
+from src.core.config import settings
 
 
-def get_link_repository(session: AsyncSession = Depends(get_async_session)) -> LinkRepository:
-    return LinkRepository(session)
+async def get_read_session(session: AsyncSession = Depends(get_async_session)) -> AsyncSession:
+    """Сессия для запросов только на чтение: реплика, если она настроена и доступна."""
+    if not replica_router.replicas:
+        yield session
+        return
+    async with async_session(bind=replica_router.pick()) as read_session:
+        yield read_session
+
+
+def get_link_repository(
+    session: AsyncSession = Depends(get_async_session),
+    read_session: AsyncSession = Depends(get_read_session)
+) -> LinkRepository:
+    return LinkRepository(session, read_session)
 
 
 def get_user_repository(session: AsyncSession = Depends(get_async_session)) -> UserRepository:
@@ -18,25 +39,118 @@ def get_user_repository(session: AsyncSession = Depends(get_async_session)) -> U
 
 
 def get_link_service(link_repository: LinkRepository = Depends(get_link_repository)) -> LinkService:
-    return LinkService(link_repository)
+    return LinkService(
+        link_repository, link_cache, click_queue, link_filter=link_filter, stats_snapshots=stats_snapshots
+    )
+
+
+async def get_redirect_service() -> RedirectService:
+    """Редирект не строит сессию и сервис на каждый запрос: сессия берется только при промахе кэша.
+
+    Асинхронная, чтобы FastAPI не отправлял ее в пул потоков.
+    """
+    return redirect_service
+
+
+@asynccontextmanager
+async def link_service_session() -> AsyncIterator[LinkService]:
+    """LinkService на собственной сессии чтения для потоковых ответов.
+
+    Тело StreamingResponse отдается уже после закрытия зависимостей запроса,
+    поэтому сессия из get_async_session к этому моменту недоступна.
+    """
+    async with open_link_repository(True) as link_repository:
+        yield LinkService(link_repository, link_cache, click_queue)
 
 
 def get_auth_service(user_repository: UserRepository = Depends(get_user_repository)) -> AuthService:
-    return AuthService(user_repository)
+    return AuthService(user_repository, credentials_cache)
 
 
-security = HTTPBasic()
+token_service = TokenService(settings.SECRET_KEY, settings.ACCESS_TOKEN_TTL_SECONDS)
+
+
+def get_token_service() -> TokenService:
+    return token_service
+
+
+security = HTTPBasic(auto_error=False)
+bearer_security = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str, scheme: str = "Basic") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": scheme},
+    )
+
+
+async def get_current_user_token(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_security)],
+    token_service: TokenService = Depends(get_token_service)
+) -> dict:
+    """Аутентификация по bearer-токену без обращения к базе данных."""
+    if credentials is None:
+        raise _unauthorized("Not authenticated", "Bearer")
+    try:
+        return token_service.verify_access_token(credentials.credentials)
+    except ValueError as e:
+        raise _unauthorized(str(e), "Bearer")
 
 
 async def get_current_user(
-    credentials: Annotated[HTTPBasicCredentials, Depends(security)],
-    auth_service: AuthService = Depends(get_auth_service)
+    bearer: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_security)],
+    credentials: Annotated[Optional[HTTPBasicCredentials], Depends(security)],
+    auth_service: AuthService = Depends(get_auth_service),
+    token_service: TokenService = Depends(get_token_service)
 ) -> dict:
+    """Аутентификация по bearer-токену либо, для совместимости, по Basic."""
+    if bearer is not None:
+        try:
+            return token_service.verify_access_token(bearer.credentials)
+        except ValueError as e:
+            raise _unauthorized(str(e), "Bearer")
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
     try:
         return await auth_service.authenticate_user(credentials.username, credentials.password)
     except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=str(e),
-            headers={"WWW-Authenticate": "Basic"},
-        )
+        raise _unauthorized(str(e))
+
+
+async def get_rate_limiter() -> Optional[RateLimiter]:
+    """Асинхронная, чтобы не уходить в пул потоков на пути редиректа."""
+    return rate_limiter
+
+
+def client_ip(request: Request) -> str:
+    """Адрес клиента; за доверенным прокси uvicorn уже подставил его из X-Forwarded-For."""
+    return request.client.host if request.client is not None else "unknown"
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+async def limit_client_rate(
+    request: Request, rate_limiter: Optional[RateLimiter] = Depends(get_rate_limiter)
+) -> None:
+    """Лимит по IP проверяется до аутентификации, чтобы перебор не тратил bcrypt."""
+    if rate_limiter is not None:
+        retry_after = rate_limiter.acquire("client", client_ip(request))
+        if retry_after:
+            raise too_many_requests(retry_after)
+
+
+async def limit_user_rate(
+    user: dict = Depends(get_current_user), rate_limiter: Optional[RateLimiter] = Depends(get_rate_limiter)
+) -> None:
+    if rate_limiter is not None:
+        retry_after = rate_limiter.acquire("user", user["id"])
+        if retry_after:
+            raise too_many_requests(retry_after)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from src.services.warmup import readiness
+
+router = APIRouter()
+
+
+@router.get("/health", tags=["Service"])
+async def health():
+    """Процесс жив и обрабатывает запросы."""
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    tags=["Service"],
+    responses={503: {"description": "Warming up or shutting down"}},
+)
+async def ready():
+    """Процесс прогрет и не находится в остановке; иначе балансировщику не следует слать трафик."""
+    if not readiness.ready:
+        return JSONResponse({"status": "not ready"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
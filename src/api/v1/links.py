@@ -1,52 +1,175 @@
-from typing import Optional, Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import RedirectResponse
+import csv
+import hashlib
+import io
+import json
+import math
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Literal, Optional, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.security import HTTPBasicCredentials
-from src.api.v1.dependencies import get_link_service, get_current_user
-from src.services.links_service import LinkService
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+from src.api.v1.dependencies import (
+    client_ip, get_link_service, get_current_user, get_rate_limiter, get_redirect_service,
+    limit_client_rate, limit_user_rate, link_service_session
+)
+from src.services.links_service import LINK_EXPIRED, LINK_INACTIVE, LINK_NOT_FOUND, LinkService
+from src.services.rate_limiter import RateLimiter
+from src.services.redirect_service import RedirectService
+from src.core.config import settings
 from src.schemas.link import (
+    BulkCreateShortUrlItem,
+    BulkCreateShortUrlRequest,
+    BulkCreateShortUrlResponse,
     CreateShortUrlRequest,
     CreateShortUrlResponse,
     DeactivateLinkResponse,
     LinkResponse,
 )
-from src.schemas.stats import StatsResponse
+from src.schemas.stats import StatsResponse, StatsSeriesResponse, TopLinkResponse
 
 router = APIRouter()
 
+http_url_adapter = TypeAdapter(HttpUrl)
+
+
+async def _read_bulk_urls(request: Request) -> List[str]:
+    """Читает список URL из JSON-тела или из NDJSON-потока (строка или объект с original_url)."""
+    if "application/x-ndjson" not in request.headers.get("content-type", ""):
+        try:
+            return BulkCreateShortUrlRequest.model_validate_json(await request.body()).urls
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    lines, buffer = [], b""
+    async for chunk in request.stream():
+        *chunk_lines, buffer = (buffer + chunk).split(b"\n")
+        lines.extend(line for line in chunk_lines if line.strip())
+        if len(lines) > settings.BULK_CREATE_MAX_ITEMS:
+            break
+    if buffer.strip():
+        lines.append(buffer)
+    try:
+        items = [json.loads(line) for line in lines]
+        return [item["original_url"] if isinstance(item, dict) else str(item) for item in items]
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid NDJSON line: {e}")
+
+
+ExportFormat = Literal["ndjson", "csv"]
+
+LINK_EXPORT_FIELDS = list(LinkResponse.model_fields)
+CLICK_EXPORT_FIELDS = ["short_url", "clicked_at"]
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _export_response(
+    rows: Callable[[LinkService], AsyncIterator[List[dict]]],
+    fields: List[str], export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    """Потоковый ответ NDJSON/CSV: в памяти одновременно держится одна пачка строк."""
+    async def body() -> AsyncIterator[str]:
+        if export_format == "csv":
+            yield ",".join(fields) + "\r\n"
+        async with link_service_session() as link_service:
+            async for batch in rows(link_service):
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows([_export_value(row[field]) for field in fields] for row in batch)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps({field: _export_value(row[field]) for field in fields}) + "\n"
+                        for row in batch
+                    )
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
 
 @router.get("/links", tags=["Private"], response_model=list[LinkResponse])
 async def get_links(
     creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    response: Response,
     is_active: Optional[bool] = None,
     limit: int = 10,
     offset: int = 0,
+    after: Optional[str] = None,
     link_service: LinkService = Depends(get_link_service),
     user: dict = Depends(get_current_user)
 ):
-    """Получение списка ссылок с пагинацией и фильтрацией по активным ссылкам."""
+    """Получение списка ссылок с пагинацией и фильтрацией по активным ссылкам.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor и передается в параметре after.
+    """
     try:
         if limit < 0 or offset < 0:
             raise ValueError("Invalid pagination parameters")
-        links = await link_service.get_all_links(is_active, limit, offset, user)
+        links, next_cursor = await link_service.get_all_links(is_active, limit, offset, user, after)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [LinkResponse.model_validate(link) for link in links]
     except ValueError as e:
         status_code = 404 if "not found" in str(e).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(e))
 
 
+@router.get("/links/export", tags=["Private"], response_class=StreamingResponse)
+async def export_links(
+    creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    is_active: Optional[bool] = None,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    user: dict = Depends(get_current_user)
+):
+    """Выгрузка всех ссылок пользователя потоком в NDJSON или CSV."""
+    return _export_response(
+        lambda link_service: link_service.export_links(is_active, user),
+        LINK_EXPORT_FIELDS, export_format, "links"
+    )
+
+
+# Лимит по IP проверяется до аутентификации, по пользователю - после
+CREATE_RATE_LIMITS = [Depends(limit_client_rate), Depends(limit_user_rate)]
+
+
 @router.post(
-    "/create_short_url", tags=["Private"], response_model=CreateShortUrlResponse, status_code=status.HTTP_201_CREATED
+    "/create_short_url",
+    tags=["Private"],
+    response_model=CreateShortUrlResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=CREATE_RATE_LIMITS,
+    responses={429: {"description": "Too many requests"}},
 )
 async def create_short_url(
     creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
     request: CreateShortUrlRequest,
+    response: Response,
+    dedup: Optional[bool] = None,
     link_service: LinkService = Depends(get_link_service),
     user: dict = Depends(get_current_user)
 ):
-    """Создание короткой ссылки."""
+    """Создание короткой ссылки.
+
+    С dedup=true для URL, на который у пользователя уже есть действующая ссылка с тем же типом редиректа,
+    возвращается она (код 200).
+    """
     try:
-        link = await link_service.create_short_url(str(request.original_url), user)
+        if settings.LINK_DEDUP_DEFAULT if dedup is None else dedup:
+            link, created = await link_service.get_or_create_short_url(
+                str(request.original_url), user, request.redirect_type
+            )
+            if not created:
+                response.status_code = status.HTTP_200_OK
+        else:
+            link = await link_service.create_short_url(str(request.original_url), user, request.redirect_type)
         return CreateShortUrlResponse(
             short_url=link,
             headers={"Location": f"/{link}"}
@@ -56,6 +179,61 @@ async def create_short_url(
         raise HTTPException(status_code=status_code, detail=str(e))
 
 
+@router.post(
+    "/links/bulk",
+    tags=["Private"],
+    response_model=BulkCreateShortUrlResponse,
+    dependencies=CREATE_RATE_LIMITS,
+    responses={429: {"description": "Too many requests"}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BulkCreateShortUrlRequest.model_json_schema()},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def create_short_urls_bulk(
+    creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    request: Request,
+    dedup: Optional[bool] = None,
+    link_service: LinkService = Depends(get_link_service),
+    user: dict = Depends(get_current_user)
+):
+    """Массовое создание коротких ссылок с результатом по каждому URL.
+
+    С dedup=true для URL с действующей ссылкой пользователя возвращается она со статусом existing.
+    """
+    urls = await _read_bulk_urls(request)
+    if len(urls) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many URLs, limit is {settings.BULK_CREATE_MAX_ITEMS}")
+
+    items, valid = [], []
+    for url in urls:
+        try:
+            valid.append((len(items), str(http_url_adapter.validate_python(url))))
+            items.append(None)
+        except ValidationError:
+            items.append(BulkCreateShortUrlItem(original_url=url, status="invalid", detail="Invalid URL"))
+
+    urls = [url for _, url in valid]
+    if settings.LINK_DEDUP_DEFAULT if dedup is None else dedup:
+        results = await link_service.get_or_create_short_urls(urls, user)
+    else:
+        short_urls = await link_service.create_short_urls(urls, user)
+        results = [(short_url, True) if short_url else None for short_url in short_urls]
+    for (index, url), result in zip(valid, results):
+        items[index] = BulkCreateShortUrlItem(
+            original_url=url,
+            short_url=result[0] if result else None,
+            status=("created" if result[1] else "existing") if result else "conflict",
+            detail=None if result else "Short URL already exists",
+        )
+    return BulkCreateShortUrlResponse(items=items)
+
+
 @router.patch(
     "/deactivate/{short_url}", tags=["Private"], response_model=DeactivateLinkResponse
 )
@@ -73,38 +251,160 @@ async def deactivate_url(
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("/stats", tags=["Private"], response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    tags=["Private"],
+    response_model=list[StatsResponse],
+    responses={304: {"description": "Statistics not modified (If-None-Match)"}},
+)
 async def get_all_stats(
     creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    request: Request,
+    response: Response,
     is_active: Optional[bool] = None,
+    limit: Optional[int] = None,
     link_service: LinkService = Depends(get_link_service),
     user: dict = Depends(get_current_user)
 ):
-    """Получение статистики по всем коротким ссылкам с сортировкой по количеству переходов за день."""
+    """Получение статистики по всем коротким ссылкам с сортировкой по количеству переходов за день.
+
+    limit оставляет первые N ссылок; неизменившаяся статистика отдается как 304 по If-None-Match.
+    """
     try:
-        return await link_service.get_stats(is_active, user)
+        stats, etag = await link_service.get_stats(is_active, user, limit)
     except ValueError as e:
         status_code = 404 if "not found" in str(e).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(e))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return stats
 
 
-@router.get("/{short_url}", tags=["Public"])
-async def redirect_url(
+@router.get("/stats/export", tags=["Private"], response_class=StreamingResponse)
+async def export_clicks(
+    creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    user: dict = Depends(get_current_user)
+):
+    """Выгрузка сырых кликов по ссылкам пользователя за период [since, until) потоком в NDJSON или CSV."""
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+    return _export_response(
+        lambda link_service: link_service.export_clicks(since, until, user),
+        CLICK_EXPORT_FIELDS, export_format, "clicks"
+    )
+
+
+@router.get("/stats/top", tags=["Private"], response_model=list[TopLinkResponse])
+async def get_top_links(
+    creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = 10,
+    link_service: LinkService = Depends(get_link_service),
+    user: dict = Depends(get_current_user)
+):
+    """Самые посещаемые ссылки пользователя за окно [from, to), по умолчанию за последние сутки."""
+    try:
+        return await link_service.get_top_links(start, end, limit, user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/stats/{short_url}/series", tags=["Private"], response_model=StatsSeriesResponse)
+async def get_click_series(
+    creds: Annotated[HTTPBasicCredentials, Depends(get_current_user)],
     short_url: str,
-    request: Request,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: Literal["minute", "hour", "day"] = "hour",
     link_service: LinkService = Depends(get_link_service),
+    user: dict = Depends(get_current_user)
 ):
-    """Редирект на оригинальную ссылку"""
+    """Клики по ссылке за окно [from, to) с разбивкой по минутам, часам или дням."""
     try:
-        link = await link_service.get_by_short_url_public(short_url)
-        await link_service.log_click(short_url)
-
-        # Избежание ошибки CORS при обращении с /docs
-        if "application/json" in request.headers.get("accept", ""):
-            return {"original_url": link["original_url"]}
-        return RedirectResponse(
-            url=link["original_url"], status_code=status.HTTP_307_TEMPORARY_REDIRECT
-        )
+        return await link_service.get_click_series(short_url, bucket, start, end, user)
     except ValueError as e:
-        status_code = 404 if "not found" in str(e).lower() else 410
+        status_code = 404 if "not found" in str(e).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(e))
+
+
+# Готовые ответы об ошибках редиректа, тело совпадает с HTTPException
+REDIRECT_ERRORS = {
+    detail: JSONResponse({"detail": detail}, status_code=status_code)
+    for detail, status_code in ((LINK_NOT_FOUND, 404), (LINK_EXPIRED, 410), (LINK_INACTIVE, 410))
+}
+
+
+PERMANENT_REDIRECTS = (status.HTTP_301_MOVED_PERMANENTLY, status.HTTP_308_PERMANENT_REDIRECT)
+
+
+def _redirect_cache_headers(link: dict) -> dict:
+    """Постоянные редиректы кэшируются не дольше срока действия ссылки, временные не кэшируются."""
+    headers = {"Vary": "Accept"}
+    max_age = 0
+    if link.get("redirect_type", 307) in PERMANENT_REDIRECTS:
+        max_age = settings.REDIRECT_CACHE_MAX_AGE_SECONDS
+        if link["expires_at"] is not None:
+            max_age = min(max_age, int((link["expires_at"] - datetime.now()).total_seconds()))
+    headers["Cache-Control"] = f"public, max-age={max_age}" if max_age > 0 else "no-store"
+    return headers
+
+
+def _etag(link: dict) -> str:
+    return '"' + hashlib.blake2b(link["original_url"].encode(), digest_size=8).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get(
+    "/{short_url}",
+    tags=["Public"],
+    responses={
+        304: {"description": "JSON variant not modified (If-None-Match)"},
+        404: {"description": LINK_NOT_FOUND},
+        410: {"description": f"{LINK_EXPIRED} / {LINK_INACTIVE}"},
+        429: {"description": "Too many requests"},
+    },
+)
+async def redirect_url(
+    short_url: str,
+    request: Request,
+    redirect_service: RedirectService = Depends(get_redirect_service),
+    rate_limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+):
+    """Редирект на оригинальную ссылку с кодом, выбранным при ее создании"""
+    if rate_limiter is not None:
+        # Лимиты проверяются до поиска ссылки: отклоненный запрос не обращается ни к кэшу, ни к базе
+        ip = client_ip(request)
+        retry_after = rate_limiter.acquire("redirect", ip) or rate_limiter.acquire("alias", (ip, short_url))
+        if retry_after:
+            return JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+    link, error = await redirect_service.resolve(short_url)
+    if error is not None:
+        return REDIRECT_ERRORS[error]
+    await redirect_service.record_click(link)
+    headers = _redirect_cache_headers(link)
+
+    # Избежание ошибки CORS при обращении с /docs
+    if "application/json" in request.headers.get("accept", ""):
+        headers["ETag"] = _etag(link)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return JSONResponse({"original_url": link["original_url"]}, headers=headers)
+    return RedirectResponse(
+        url=link["original_url"], status_code=link.get("redirect_type", 307), headers=headers
+    )
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.core.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["Service"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
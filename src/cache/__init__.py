@@ -0,0 +1,19 @@
+from src.cache.base import CacheBackend
+from src.cache.memory import MemoryCache
+from src.cache.redis import RedisCache
+from src.core.config import settings
+
+
+def create_cache(namespace: str, max_size: int, ttl: float) -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache.from_url(namespace, settings.REDIS_URL, max_size, ttl, settings.CACHE_LOCAL_TTL_SECONDS)
+    return MemoryCache(max_size, ttl)
+
+
+# Кэш горячих коротких ссылок для публичного редиректа
+link_cache = create_cache("links", settings.LINK_CACHE_SIZE, settings.LINK_CACHE_TTL_SECONDS)
+
+# Кэш успешно проверенных учетных данных для Basic-аутентификации
+credentials_cache = create_cache(
+    "credentials", settings.CREDENTIALS_CACHE_SIZE, settings.CREDENTIALS_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удаляет ключ во всех воркерах, разделяющих кэш."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,46 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Фильтр Блума: ложноположительные ответы возможны с заданной вероятностью, ложноотрицательные нет."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._bits_set = 0
+
+    def _positions(self, key: str):
+        # Двойное хеширование: k позиций из двух 64-битных половин одного дайджеста
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        added = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                self._bits_set += 1
+                added = True
+        self.count += added
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Оценка вероятности ложноположительного ответа по доле установленных битов."""
+        return (self._bits_set / self.size) ** self.hash_count
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
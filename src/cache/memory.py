@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from src.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """LRU-кэш в памяти процесса с ограниченным размером и TTL записей."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+    def get_local(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set_local(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete_local(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.get_local(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_local(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self.delete_local(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
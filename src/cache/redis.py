@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import math
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+from src.cache.base import CacheBackend
+from src.cache.memory import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, default=lambda obj: {"__datetime__": obj.isoformat()})
+
+
+def _decode(raw: str) -> Any:
+    return json.loads(
+        raw, object_hook=lambda obj: datetime.fromisoformat(obj["__datetime__"]) if "__datetime__" in obj else obj
+    )
+
+
+class RedisCache(CacheBackend):
+    """Общий кэш в Redis с локальным near-кэшем процесса.
+
+    Удаление ключа публикуется в канал pub/sub, и каждый воркер сбрасывает его из
+    локального кэша. Если сообщение потеряно при разрыве соединения, устаревшая
+    запись живет не дольше local_ttl.
+
+    Удаление также увеличивает версию ключа. Запись после промаха сохраняется,
+    только если версия не изменилась с момента промаха: иначе чтение из базы,
+    начатое до удаления, вернуло бы в кэш устаревшее значение.
+    """
+
+    def __init__(self, namespace: str, client, max_size: int, ttl: float, local_ttl: float):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = f"alias:{namespace}:"
+        self.version_prefix = f"alias:{namespace}-version:"
+        self.channel = f"alias:invalidate:{namespace}"
+        self.local = MemoryCache(max_size, local_ttl)
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self.errors = 0
+        self._listener: Optional[asyncio.Task] = None
+        # Версии ключей, прочитанные при промахе, до записи значения из базы
+        self._observed: "OrderedDict[str, str]" = OrderedDict()
+        self._max_observed = max_size
+        # Счетчик полученных инвалидаций: ответ Redis, прочитанный до инвалидации, не попадает в локальный кэш
+        self._invalidations = 0
+
+    @classmethod
+    def from_url(cls, namespace: str, url: str, max_size: int, ttl: float, local_ttl: float) -> "RedisCache":
+        import redis.asyncio as redis
+
+        return cls(namespace, redis.from_url(url, decode_responses=True), max_size, ttl, local_ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get_local(key)
+        if value is not None:
+            return value
+        invalidations = self._invalidations
+        try:
+            raw, version = await self.client.mget(self.prefix + key, self.version_prefix + key)
+        except Exception:
+            # Недоступность Redis не должна ломать редирект: запрос уйдет в Postgres
+            self.errors += 1
+            logger.warning("Redis get failed for %s", key, exc_info=True)
+            return None
+        if raw is None:
+            self.remote_misses += 1
+            self._observe(key, version or "0")
+            return None
+        self.remote_hits += 1
+        value = _decode(raw)
+        if invalidations == self._invalidations:
+            self.local.set_local(key, value)
+        return value
+
+    def _observe(self, key: str, version: str) -> None:
+        self._observed[key] = version
+        self._observed.move_to_end(key)
+        while len(self._observed) > self._max_observed:
+            self._observed.popitem(last=False)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        expected = self._observed.pop(key, None)
+        try:
+            stored = await self._store(key, _encode(value), max(1, math.ceil(ttl)), expected)
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis set failed for %s", key, exc_info=True)
+            stored = True
+        if stored:
+            self.local.set_local(key, value, ttl)
+
+    async def _store(self, key: str, raw: str, ex: int, expected: Optional[str]) -> bool:
+        """Записывает значение; False, если ключ удалили после промаха, на котором прочитана версия."""
+        if expected is None:
+            await self.client.set(self.prefix + key, raw, ex=ex)
+            return True
+        from redis.exceptions import WatchError
+
+        version_key = self.version_prefix + key
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(version_key)
+                if (await pipe.get(version_key) or "0") != expected:
+                    return False
+                pipe.multi()
+                pipe.set(self.prefix + key, raw, ex=ex)
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._invalidations += 1
+        self.local.delete_local(key)
+        try:
+            version_key = self.version_prefix + key
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.incr(version_key)
+                # Версия переживает любое значение, записанное до удаления
+                pipe.expire(version_key, max(1, math.ceil(self.ttl)))
+                pipe.delete(self.prefix + key)
+                await pipe.execute()
+            await self.client.publish(self.channel, key)
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis invalidation failed for %s", key, exc_info=True)
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.client.aclose()
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._invalidations += 1
+                        self.local.delete_local(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Пропущенные за время разрыва инвалидации неизвестны, поэтому локальный кэш сбрасывается целиком
+                self.errors += 1
+                logger.warning("Redis invalidation listener failed, resubscribing", exc_info=True)
+                self._invalidations += 1
+                self.local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def stats(self) -> dict:
+        local = self.local.stats()
+        return {
+            "size": local["size"],
+            "hits": local["hits"] + self.remote_hits,
+            "misses": self.remote_misses,
+            "errors": self.errors,
+        }
@@ -1,5 +1,10 @@
+from typing import Literal
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Значения-заглушки из примеров конфигурации: с ними токен может подделать кто угодно
+SECRET_KEY_PLACEHOLDERS = {"change-me", "change-me-to-a-random-string-of-32-chars"}
+
 
 class Settings(BaseSettings):
     POSTGRES_USER: str
@@ -8,14 +13,116 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
     MODE: str
-    SHORT_URL_LENGTH: int = 6
+    # Production-сервер (python -m src.server); SO_REUSEPORT позволяет нескольким экземплярам слушать один порт
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = Field(default=1, ge=1)
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_REUSE_PORT: bool = False
+    SERVER_ACCESS_LOG: bool = False
+    # Адрес клиента берется из X-Forwarded-For, только если соединение пришло с этих адресов или сетей;
+    # за балансировщиком или CDN их нужно указать, иначе лимиты по IP считают всех одним клиентом
+    SERVER_PROXY_HEADERS: bool = True
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    # Прогрев при старте: соединения пула (не больше DB_POOL_SIZE) и самые посещаемые ссылки в кэше
+    WARMUP_DB_CONNECTIONS: int = Field(default=5, ge=0)
+    WARMUP_HOT_LINKS: int = Field(default=1000, ge=0)
+    WARMUP_HOT_LINKS_WINDOW_SECONDS: int = 3600
+    WARMUP_TIMEOUT_SECONDS: float = 30
+    # Реплики для чтения через запятую в формате host:port; учетные данные как у основной базы
+    POSTGRES_REPLICAS: str = ""
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    # Кэш подготовленных выражений asyncpg на соединение; 0 отключает
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    SHORT_URL_LENGTH: int = Field(default=6, ge=1, le=10)
+    SHORT_URL_GENERATOR: Literal["sequence", "random"] = "sequence"
+    SHORT_URL_BLOCK_SIZE: int = 1000
+    SHORT_URL_MAX_ATTEMPTS: int = 5
+    BULK_CREATE_MAX_ITEMS: int = 10000
+    # Режим создания по умолчанию: повторный URL возвращает действующую ссылку пользователя
+    LINK_DEDUP_DEFAULT: bool = False
+    # Строк на одну выборку серверного курсора и на один фрагмент потокового ответа
+    EXPORT_BATCH_SIZE: int = 1000
     DEFAULT_LINK_EXPIRY_DAYS: int = 1
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Срок жизни локальной копии общего кэша, если инвалидация через pub/sub потеряна
+    CACHE_LOCAL_TTL_SECONDS: float = 5
+    LINK_CACHE_SIZE: int = 10000
+    LINK_CACHE_TTL_SECONDS: float = 60
+    # Верхняя граница max-age постоянных редиректов (301/308)
+    REDIRECT_CACHE_MAX_AGE_SECONDS: int = 86400
+    # Фильтр Блума существующих коротких кодов: несуществующие отклоняются без запроса к базе
+    LINK_FILTER_ENABLED: bool = True
+    LINK_FILTER_CAPACITY: int = 1000000
+    LINK_FILTER_ERROR_RATE: float = Field(default=0.01, gt=0, lt=1)
+    # Коды из других воркеров приходят через LISTEN/NOTIFY; без подписки фильтр не отклоняет коды
+    LINK_FILTER_RECONNECT_INTERVAL_SECONDS: float = 1.0
+    LINK_FILTER_KEEPALIVE_SECONDS: float = 30
+    LINK_FILTER_LOOKBACK_SECONDS: float = 60
+    # Общий для всех воркеров ключ подписи токенов и кэша учетных данных; задается явно
+    SECRET_KEY: str = Field(min_length=32)
+    ACCESS_TOKEN_TTL_SECONDS: int = 3600
+    CREDENTIALS_CACHE_SIZE: int = 10000
+    CREDENTIALS_CACHE_TTL_SECONDS: float = 300
+    CLICK_QUEUE_BATCH_SIZE: int = 1000
+    CLICK_QUEUE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    CLICK_QUEUE_MAX_SIZE: int = 100000
+    # Сырые клики хранятся не меньше самого длинного окна статистики (сутки)
+    CLICK_RETENTION_DAYS: int = Field(default=1, ge=1)
+    CLICK_RETENTION_INTERVAL_SECONDS: float = 3600
+    # Клики секционированы по времени; устаревшие секции удаляются целиком
+    CLICK_PARTITION_INTERVAL: Literal["day", "month"] = "day"
+    CLICK_PARTITIONS_AHEAD: int = Field(default=3, ge=1)
+    LINK_EXPIRY_SWEEP_INTERVAL_SECONDS: float = 60
+    MAINTENANCE_BATCH_SIZE: int = 10000
+    STATS_SERIES_MAX_POINTS: int = 10080
+    STATS_TOP_MAX_LIMIT: int = 100
+    # Снимки статистики пользователей перестраиваются не чаще раза в TTL, между ними дополняются кликами
+    STATS_SNAPSHOTS_ENABLED: bool = True
+    STATS_SNAPSHOT_TTL_SECONDS: float = Field(default=30, gt=0)
+    STATS_SNAPSHOT_MAX_USERS: int = 10000
+    # Ограничение частоты запросов (токенов в секунду и запас); нулевая скорость отключает лимит
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_SHARDS: int = Field(default=16, ge=1)
+    # Создание ссылок: по IP до аутентификации и по пользователю после нее
+    RATE_LIMIT_CLIENT_PER_SECOND: float = Field(default=10, ge=0)
+    RATE_LIMIT_CLIENT_BURST: int = Field(default=20, ge=1)
+    RATE_LIMIT_USER_PER_SECOND: float = Field(default=5, ge=0)
+    RATE_LIMIT_USER_BURST: int = Field(default=20, ge=1)
+    # Редирект: по IP и по паре IP и короткий код
+    RATE_LIMIT_REDIRECT_PER_SECOND: float = Field(default=100, ge=0)
+    RATE_LIMIT_REDIRECT_BURST: int = Field(default=200, ge=1)
+    RATE_LIMIT_ALIAS_PER_SECOND: float = Field(default=2, ge=0)
+    RATE_LIMIT_ALIAS_BURST: int = Field(default=20, ge=1)
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
+    @field_validator("SECRET_KEY")
+    @classmethod
+    def check_secret_key(cls, value: str) -> str:
+        if value in SECRET_KEY_PLACEHOLDERS:
+            raise ValueError("SECRET_KEY must be replaced with a random value")
+        return value
+
     @property
     def DB_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def REPLICA_DB_URLS(self) -> list[str]:
+        return [
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{replica.strip()}/{self.POSTGRES_DB}"
+            for replica in self.POSTGRES_REPLICAS.split(",") if replica.strip()
+        ]
+
 
 settings = Settings()
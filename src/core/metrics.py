@@ -0,0 +1,220 @@
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, value: float = 1) -> None:
+        self.inc(*labels, value=-value)
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # На каждую комбинацию меток: счетчики по бакетам (последний — +Inf) и сумма
+        self.values: Dict[tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {total[0]}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Функция, обновляющая метрики непосредственно перед выгрузкой."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed."
+))
+stage_duration = registry.register(Histogram(
+    "stage_duration_seconds", "Time spent in service and repository methods.", ("stage",)
+))
+db_queries_total = registry.register(Counter("db_queries_total", "SQL statements executed."))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50)
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection."
+))
+db_pool_wait_per_request = registry.register(Histogram(
+    "db_pool_wait_per_request_seconds", "Total pool checkout wait per HTTP request.", ("route",)
+))
+
+
+class RequestStats:
+    __slots__ = ("queries", "pool_wait")
+
+    def __init__(self):
+        self.queries = 0
+        self.pool_wait = 0.0
+
+
+# Статистика текущего HTTP-запроса для событий SQLAlchemy
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_query() -> None:
+    db_queries_total.inc()
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+
+
+def record_pool_wait(seconds: float) -> None:
+    db_pool_checkout_wait.observe(seconds)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+
+def timed(stage: str):
+    """Декоратор: записывает длительность корутины в stage_duration_seconds."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                stage_duration.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+def instrument(prefix: str):
+    """Декоратор класса: оборачивает публичные корутины в timed с именем Класс.метод."""
+    def decorator(cls):
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(attr):
+                setattr(cls, name, timed(f"{prefix}.{name}")(attr))
+        return cls
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность по шаблону маршрута, запросы в работе и число SQL-запросов."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            request_stats.reset(token)
+            # Шаблон пути вместо самого пути ограничивает число рядов метрик
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_request_duration.observe(duration, method, route)
+            http_requests_total.inc(method, route, str(status_code))
+            db_queries_per_request.observe(stats.queries, route)
+            db_pool_wait_per_request.observe(stats.pool_wait, route)
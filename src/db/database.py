@@ -1,12 +1,96 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import itertools
+import logging
+import time
+from typing import List
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.core.config import settings
-from src.db import Base  # Импортируем Base
-from src.models import User, Link, Click  # Импортируем модели для создания таблиц
+from src.core.metrics import record_query, record_pool_wait
 
-engine = create_async_engine(
-    settings.DB_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=True if settings.MODE == "dev" else False,
-)
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record_pool_wait(time.perf_counter() - start)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    record_query()
+
+
+def create_engine(db_url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        make_url(db_url.replace("postgresql://", "postgresql+asyncpg://")).update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        ),
+        echo=True if settings.MODE == "dev" else False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_query)
+    return engine
+
+
+class ReplicaRouter:
+    """Выбор здоровой реплики для чтения; без здоровых реплик чтение идет на основную базу."""
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine]):
+        self.primary = primary
+        self.replicas = replicas
+        self.healthy = list(replicas)
+        self._counter = itertools.count()
+        for replica in replicas:
+            event.listen(replica.sync_engine, "handle_error", self._on_error(replica))
+
+    def _on_error(self, replica: AsyncEngine):
+        def handle_error(context):
+            # Реплика с оборванным соединением исключается до следующей успешной проверки
+            if context.is_disconnect:
+                self.mark_unhealthy(replica)
+        return handle_error
+
+    def mark_unhealthy(self, replica: AsyncEngine) -> None:
+        if replica in self.healthy:
+            logger.warning("Replica %s is unhealthy", replica.url.render_as_string())
+            self.healthy = [engine for engine in self.healthy if engine is not replica]
+
+    def pick(self) -> AsyncEngine:
+        healthy = self.healthy
+        if not healthy:
+            return self.primary
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_health(self) -> None:
+        healthy = []
+        for replica in self.replicas:
+            try:
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                healthy.append(replica)
+            except Exception:
+                logger.warning("Replica %s failed health check", replica.url.render_as_string(), exc_info=True)
+        self.healthy = healthy
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+engine = create_engine(settings.DB_URL)
+replica_router = ReplicaRouter(engine, [create_engine(url) for url in settings.REPLICA_DB_URLS])
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -15,9 +99,3 @@ async def get_async_session() -> AsyncSession:
     """Предоставляет асинхронную сессию для транзакций."""
     async with async_session() as session:
         yield session
-
-
-async def init_db():
-    """Инициализирует таблицы в базе данных."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
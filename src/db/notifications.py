@@ -0,0 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+NotificationCallback = Callable[[str], None]
+
+
+class Subscription:
+    """Подписка LISTEN на выделенном соединении."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._closed = asyncio.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def close(self, *args) -> None:
+        self._closed.set()
+
+    async def wait_closed(self, keepalive: float) -> None:
+        """Возвращается при обрыве соединения; простаивающее соединение проверяется запросом раз в keepalive."""
+        while not self._closed.is_set():
+            try:
+                await asyncio.wait_for(self._closed.wait(), keepalive)
+            except asyncio.TimeoutError:
+                await self._connection.execute("SELECT 1")
+
+
+@asynccontextmanager
+async def listen(engine: AsyncEngine, channel: str, callback: NotificationCallback) -> AsyncIterator[Subscription]:
+    """LISTEN на соединении из пула; соединение возвращается в пул, только если оно живо."""
+    async with engine.connect() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        subscription = Subscription(driver)
+
+        def on_notification(connection, pid, channel, payload):
+            callback(payload)
+
+        driver.add_termination_listener(subscription.close)
+        try:
+            await driver.add_listener(channel, on_notification)
+            yield subscription
+        except BaseException:
+            await conn.invalidate()
+            raise
+        finally:
+            driver.remove_termination_listener(subscription.close)
+        if subscription.closed:
+            await conn.invalidate()
+        else:
+            await driver.remove_listener(channel, on_notification)
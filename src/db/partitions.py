@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
+
+PartitionInterval = Literal["day", "month"]
+
+# Формат суффикса имени секции однозначно задает ее интервал
+_NAME_FORMATS = {"day": "%Y%m%d", "month": "%Y%m"}
+
+
+def partition_start(moment: datetime, interval: PartitionInterval) -> datetime:
+    """Начало секции, в которую попадает момент времени."""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.replace(day=1) if interval == "month" else start
+
+
+def next_partition_start(start: datetime, interval: PartitionInterval) -> datetime:
+    if interval == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return datetime.fromordinal(start.toordinal() + 1)
+
+
+def partition_name(table: str, start: datetime, interval: PartitionInterval) -> str:
+    return f"{table}_p{start.strftime(_NAME_FORMATS[interval])}"
+
+
+def partition_bounds(table: str, name: str) -> Optional[Tuple[datetime, datetime]]:
+    """Границы секции по ее имени; None для секции по умолчанию и чужих таблиц."""
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    suffix = name[len(prefix):]
+    for interval, name_format in _NAME_FORMATS.items():
+        if len(suffix) == len(datetime(2000, 1, 1).strftime(name_format)):
+            try:
+                start = datetime.strptime(suffix, name_format)
+            except ValueError:
+                return None
+            return start, next_partition_start(start, interval)
+    return None
+
+
+def partition_ranges(
+    table: str, start: datetime, end: datetime, interval: PartitionInterval
+) -> List[Tuple[str, datetime, datetime]]:
+    """Секции (имя, начало, конец), покрывающие промежуток [start, end)."""
+    ranges = []
+    current = partition_start(start, interval)
+    while current < end:
+        following = next_partition_start(current, interval)
+        ranges.append((partition_name(table, current, interval), current, following))
+        current = following
+    return ranges
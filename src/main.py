@@ -1,14 +1,43 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from src.db.database import init_db, engine
+from src.db.database import engine, replica_router
 from src.api.v1 import main_router
+from src.cache import link_cache, credentials_cache
+from src.core.metrics import registry, MetricsMiddleware, Gauge
+from src.services.click_queue import click_queue
+from src.services.maintenance import click_retention_task, link_expiry_task, replica_health_task
+from src.services.redirect_service import link_filter
+from src.services.stats_snapshots import stats_snapshots
+from src.services.rate_limiter import rate_limiter
+from src.services.warmup import readiness, warm_up
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Управление жизненным циклом приложения."""
-    await init_db()
+    """Управление жизненным циклом приложения. Схема БД применяется миграциями Alembic."""
+    await link_cache.start()
+    await credentials_cache.start()
+    await warm_up()
+    if link_filter is not None:
+        await link_filter.load()
+        link_filter.start()
+    click_queue.start()
+    click_retention_task.start()
+    link_expiry_task.start()
+    if replica_router.replicas:
+        replica_health_task.start()
+    readiness.ready = True
     yield
+    readiness.ready = False
+    if link_filter is not None:
+        await link_filter.stop()
+    await replica_health_task.stop()
+    await link_expiry_task.stop()
+    await click_retention_task.stop()
+    await click_queue.stop()
+    await credentials_cache.close()
+    await link_cache.close()
+    await replica_router.dispose()
     await engine.dispose()
 
 
@@ -19,4 +48,53 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
 app.include_router(main_router)
+
+cache_entries = registry.register(Gauge("cache_entries", "Entries in in-process caches.", ("cache",)))
+cache_hits = registry.register(Gauge("cache_hits", "Cache hits since start.", ("cache",)))
+cache_misses = registry.register(Gauge("cache_misses", "Cache misses since start.", ("cache",)))
+click_queue_size = registry.register(Gauge("click_queue_size", "Clicks waiting to be written."))
+click_queue_dropped = registry.register(Gauge("click_queue_dropped", "Clicks dropped on queue overflow."))
+link_filter_entries = registry.register(Gauge("link_filter_entries", "Short codes in the existence filter."))
+link_filter_memory = registry.register(Gauge("link_filter_memory_bytes", "Memory used by the existence filter bits."))
+link_filter_fp_rate = registry.register(
+    Gauge("link_filter_false_positive_rate", "Estimated false positive rate of the existence filter.")
+)
+link_filter_synced = registry.register(
+    Gauge("link_filter_synced", "1 while the existence filter is subscribed to created codes.")
+)
+link_filter_rejected = registry.register(
+    Gauge("link_filter_rejected", "Redirects answered as not found by the existence filter.")
+)
+rate_limit_keys = registry.register(Gauge("rate_limit_keys", "Keys tracked by the rate limiter.", ("scope",)))
+rate_limit_rejected = registry.register(
+    Gauge("rate_limit_rejected", "Requests rejected by the rate limiter.", ("scope",))
+)
+
+
+def collect_runtime_metrics() -> None:
+    caches = [("links", link_cache), ("credentials", credentials_cache)]
+    if stats_snapshots is not None:
+        caches.append(("stats_snapshots", stats_snapshots))
+    for name, cache in caches:
+        stats = cache.stats()
+        cache_entries.set(name, value=stats["size"])
+        cache_hits.set(name, value=stats["hits"])
+        cache_misses.set(name, value=stats["misses"])
+    click_queue_size.set(value=click_queue.size)
+    click_queue_dropped.set(value=click_queue.dropped)
+    if link_filter is not None:
+        stats = link_filter.stats()
+        link_filter_entries.set(value=stats["size"])
+        link_filter_memory.set(value=stats["memory_bytes"])
+        link_filter_fp_rate.set(value=stats["false_positive_rate"])
+        link_filter_rejected.set(value=stats["rejected"])
+        link_filter_synced.set(value=int(stats["synced"]))
+    if rate_limiter is not None:
+        for scope, stats in rate_limiter.stats().items():
+            rate_limit_keys.set(scope, value=stats["size"])
+            rate_limit_rejected.set(scope, value=stats["rejected"])
+
+
+registry.add_collector(collect_runtime_metrics)
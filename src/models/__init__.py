@@ -1,3 +1,4 @@
 from .user import User
 from .link import Link
 from .click import Click
+from .click_bucket import ClickMinuteBucket, ClickHourBucket
@@ -1,11 +1,19 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from src.db import Base  # Изменён импорт
 
 
 class Click(Base):
+    """Сырые клики; таблица секционирована по clicked_at, секции ведет фоновая задача."""
     __tablename__ = "clicks"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), nullable=False)
-    clicked_at = Column(DateTime, server_default=func.now())
+    # Ключ секционирования обязан входить в первичный ключ
+    clicked_at = Column(DateTime, primary_key=True, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_clicks_link_id_clicked_at", link_id, clicked_at),
+        Index("ix_clicks_clicked_at", clicked_at),
+        {"postgresql_partition_by": "RANGE (clicked_at)"},
+    )
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from src.db import Base
+
+# Минутные бакеты нужны для точного подсчета кликов за последние сутки
+MINUTE_BUCKETS_RETENTION = timedelta(hours=25)
+
+# Шаги временных рядов статистики
+SERIES_BUCKETS = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+class ClickMinuteBucket(Base):
+    __tablename__ = "click_buckets_minute"
+
+    link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    clicks = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Удаление устаревших минутных бакетов
+        Index("ix_click_buckets_minute_bucket_start", bucket_start),
+    )
+
+
+class ClickHourBucket(Base):
+    __tablename__ = "click_buckets_hour"
+
+    link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    clicks = Column(Integer, nullable=False, default=0)
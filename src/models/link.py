@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, DateTime, ForeignKey, Index, LargeBinary, Sequence
 from sqlalchemy.sql import func
 from src.db import Base  # Изменён импорт
 
@@ -14,3 +14,25 @@ class Link(Base):
     expires_at = Column(DateTime, nullable=True)
     click_count = Column(Integer, default=0)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Код ответа редиректа: 301/308 кэшируются клиентами, 302/307 приходят в сервис при каждом переходе
+    redirect_type = Column(SmallInteger, nullable=False, default=307, server_default="307")
+    # SHA-256 нормализованного URL; заполняется только при создании с дедупликацией
+    url_hash = Column(LargeBinary(32), nullable=True)
+
+    __table_args__ = (
+        # Keyset-пагинация списка ссылок пользователя
+        Index("ix_links_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        # Фоновая деактивация истекших ссылок
+        Index("ix_links_expires_at_active", expires_at, postgresql_where=is_active),
+        # Дочитывание новых коротких кодов в фильтр существующих ссылок
+        Index("ix_links_created_at", created_at),
+        # Одна активная ссылка пользователя на URL в режиме дедупликации
+        Index(
+            "ux_links_user_id_url_hash_active", user_id, url_hash, unique=True,
+            postgresql_where=is_active & url_hash.isnot(None)
+        ),
+    )
+
+
+# Блоки номеров для генерации коротких кодов, арендуемые воркерами
+short_code_block_seq = Sequence("short_code_blocks", metadata=Base.metadata)
@@ -1,11 +1,35 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from datetime import datetime
 
 
 class LinkRepositoryInterface(ABC):
     @abstractmethod
-    async def create(self, original_url: str, short_url: str, expires_at: datetime, user_id: int) -> dict:
+    async def create(
+        self, original_url: str, short_url: str, expires_at: datetime, user_id: int, redirect_type: int = 307
+    ) -> dict:
+        pass
+
+    @abstractmethod
+    async def create_deduplicated(
+        self, original_url: str, url_hash: bytes, short_url: str, expires_at: datetime, user_id: int,
+        redirect_type: int = 307
+    ) -> Tuple[dict, bool]:
+        pass
+
+    @abstractmethod
+    async def create_many(
+        self, links: List[Tuple[str, str]], expires_at: datetime, user_id: int,
+        url_hashes: Optional[List[bytes]] = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_by_url_hashes(self, user_id: int, url_hashes: List[bytes]) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def lease_code_block(self) -> int:
         pass
 
     @abstractmethod
@@ -13,7 +37,34 @@ class LinkRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_all(self, is_active: Optional[bool], limit: int, offset: int, user_id: int) -> List[dict]:
+    async def get_public_link(self, short_url: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    async def estimate_link_count(self) -> int:
+        pass
+
+    @abstractmethod
+    def stream_short_urls(
+        self, created_since: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[Tuple[str, datetime]]]:
+        pass
+
+    @abstractmethod
+    async def get_all(
+        self, is_active: Optional[bool], limit: int, offset: int, user_id: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    def stream_links(self, user_id: int, is_active: Optional[bool], batch_size: int) -> AsyncIterator[List[dict]]:
+        pass
+
+    @abstractmethod
+    def stream_clicks(
+        self, user_id: int, since: Optional[datetime], until: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[dict]]:
         pass
 
     @abstractmethod
@@ -25,9 +76,43 @@ class LinkRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_stats(self, is_active: Optional[bool], user_id: int) -> List[dict]:
+    async def log_clicks(self, clicks: List[Tuple[int, datetime]]) -> None:
+        pass
+
+    @abstractmethod
+    async def get_stats(self, is_active: Optional[bool], user_id: int, primary: bool = False) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_click_series(self, link_id: int, bucket: str, start: datetime, end: datetime) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_top_links(
+        self, user_id: int, start: datetime, end: datetime, limit: int, bucket: str = "minute"
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_hot_links(self, since: datetime, limit: int) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def prune_click_history(self, raw_before: datetime, minute_before: datetime, batch_size: int) -> int:
+        pass
+
+    @abstractmethod
+    async def create_click_partition(self, name: str, start: datetime, end: datetime) -> None:
+        pass
+
+    @abstractmethod
+    async def list_click_partitions(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def drop_click_partition(self, name: str) -> None:
         pass
 
     @abstractmethod
-    async def update_expired_links(self) -> int:
+    async def update_expired_links(self, batch_size: int) -> int:
         pass
@@ -1,25 +1,65 @@
-from typing import List, Optional
+from collections import Counter
+from typing import AsyncIterator, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, func, case
+from sqlalchemy import (
+    select, update, insert, delete, and_, or_, not_, func, bindparam, tuple_, text, literal_column
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import select as sql_select
 from datetime import timedelta, datetime
 from src.repositories.interfaces.links_repository import LinkRepositoryInterface
-from src.models.link import Link
+from src.models.link import Link, short_code_block_seq
 from src.models.click import Click
+from src.models.click_bucket import ClickMinuteBucket, ClickHourBucket, MINUTE_BUCKETS_RETENTION, SERIES_BUCKETS
+from src.core.metrics import instrument
 
+# Не более 32767 параметров на запрос у asyncpg: 7 колонок * 1000 строк
+BULK_INSERT_CHUNK_SIZE = 1000
 
+
+def _active_clause(is_active: bool, now: datetime):
+    """Условие активности ссылки с учетом срока действия, без ожидания фоновой деактивации."""
+    not_expired = or_(Link.expires_at.is_(None), Link.expires_at >= now)
+    if is_active:
+        return and_(Link.is_active == True, not_expired)
+    return or_(Link.is_active == False, not_(not_expired))
+
+
+def _bucket_sum(bucket, *criteria):
+    """Сумма кликов по бакетам текущей ссылки; читает только диапазон первичного ключа."""
+    return (
+        select(func.coalesce(func.sum(bucket.clicks), 0))
+        .where(bucket.link_id == Link.id, *criteria)
+        .correlate(Link)
+        .scalar_subquery()
+    )
+
+
+def _click_source(bucket: str, start: datetime):
+    """Бакеты для окна: минутные, пока они хранятся, иначе часовые (границы окна выровнены по часу)."""
+    if bucket == "minute" or start >= datetime.now() - MINUTE_BUCKETS_RETENTION:
+        return ClickMinuteBucket
+    return ClickHourBucket
+
+
+@instrument("LinkRepository")
 class LinkRepository(LinkRepositoryInterface):
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, read_session: Optional[AsyncSession] = None):
         self.session = session
+        # Запросы только на чтение могут обслуживаться репликой
+        self.read_session = read_session or session
 
-    async def create(self, original_url: str, short_url: str, expires_at: datetime, user_id: int) -> dict:
+    async def create(
+        self, original_url: str, short_url: str, expires_at: datetime, user_id: int, redirect_type: int = 307
+    ) -> dict:
         link = Link(
             original_url=original_url,
             short_url=short_url,
             expires_at=expires_at,
             click_count=0,
-            user_id=user_id
+            user_id=user_id,
+            redirect_type=redirect_type
         )
         try:
             self.session.add(link)
@@ -30,22 +70,188 @@ class LinkRepository(LinkRepositoryInterface):
             await self.session.rollback()
             raise ValueError("Short URL already exists")
 
+    async def _release_expired_hashes(self, user_id: int, url_hashes: List[bytes]) -> None:
+        """Деактивирует истекшие ссылки с этими хешами, освобождая место в уникальном индексе."""
+        await self.session.execute(
+            update(Link)
+            .where(
+                Link.user_id == user_id, Link.url_hash.in_(url_hashes),
+                Link.is_active == True, Link.expires_at < datetime.now()
+            )
+            .values(is_active=False)
+        )
+
+    async def create_deduplicated(
+        self, original_url: str, url_hash: bytes, short_url: str, expires_at: datetime, user_id: int,
+        redirect_type: int = 307
+    ) -> Tuple[dict, bool]:
+        """Создает ссылку либо возвращает активную ссылку пользователя с тем же хешем URL.
+
+        Второй элемент результата - была ли ссылка создана.
+        """
+        links = Link.__table__
+        await self._release_expired_hashes(user_id, [url_hash])
+        stmt = (
+            pg_insert(links)
+            .values(
+                original_url=original_url, short_url=short_url, url_hash=url_hash, is_active=True,
+                expires_at=expires_at, click_count=0, user_id=user_id, redirect_type=redirect_type
+            )
+            .on_conflict_do_nothing(
+                index_elements=[links.c.user_id, links.c.url_hash],
+                index_where=and_(links.c.is_active, links.c.url_hash.isnot(None))
+            )
+            .returning(*links.c)
+        )
+        try:
+            row = (await self.session.execute(stmt)).first()
+            if row is None:
+                # Ссылку на этот URL успел создать параллельный запрос
+                row = (await self.session.execute(
+                    select(links).where(
+                        links.c.user_id == user_id, links.c.url_hash == url_hash, links.c.is_active == True
+                    )
+                )).first()
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise ValueError("Short URL already exists")
+        if row is None:
+            raise ValueError("Short URL already exists")
+        return dict(row._mapping), row.short_url == short_url
+
+    async def create_many(
+        self, links: List[Tuple[str, str]], expires_at: datetime, user_id: int,
+        url_hashes: Optional[List[bytes]] = None
+    ) -> List[dict]:
+        """Вставляет ссылки многострочными INSERT; занятые короткие коды пропускаются.
+
+        С url_hashes пропускаются и URL, для которых у пользователя уже есть активная ссылка.
+        """
+        if url_hashes is not None:
+            await self._release_expired_hashes(user_id, list(set(url_hashes)))
+        created = []
+        for start in range(0, len(links), BULK_INSERT_CHUNK_SIZE):
+            chunk = links[start:start + BULK_INSERT_CHUNK_SIZE]
+            stmt = pg_insert(Link).values([
+                {
+                    "original_url": original_url,
+                    "short_url": short_url,
+                    "url_hash": url_hashes[start + index] if url_hashes is not None else None,
+                    "is_active": True,
+                    "expires_at": expires_at,
+                    "click_count": 0,
+                    "user_id": user_id,
+                }
+                for index, (original_url, short_url) in enumerate(chunk)
+            ])
+            # Без явного индекса конфликт по любому уникальному индексу, включая индекс хешей URL
+            stmt = stmt.on_conflict_do_nothing() if url_hashes is not None \
+                else stmt.on_conflict_do_nothing(index_elements=[Link.short_url])
+            result = await self.session.execute(stmt.returning(Link.id, Link.original_url, Link.short_url))
+            created.extend(dict(row._mapping) for row in result)
+        await self.session.commit()
+        return created
+
+    async def get_by_url_hashes(self, user_id: int, url_hashes: List[bytes]) -> List[dict]:
+        """Активные ссылки пользователя по хешам URL; поиск по уникальному частичному индексу."""
+        links = Link.__table__
+        result = await self.session.execute(
+            select(links.c.short_url, links.c.url_hash, links.c.expires_at)
+            .where(links.c.user_id == user_id, links.c.url_hash.in_(url_hashes), links.c.is_active == True)
+        )
+        return [dict(row._mapping) for row in result]
+
+    async def lease_code_block(self) -> int:
+        return await self.session.scalar(select(short_code_block_seq.next_value()))
+
     async def get_by_short_url(self, short_url: str, user_id: Optional[int] = None) -> Optional[dict]:
         query = select(Link).where(Link.short_url == short_url)
         if user_id is not None:
             query = query.where(Link.user_id == user_id)
-        result = await self.session.execute(query)
+        result = await self.read_session.execute(query)
         link = result.scalar_one_or_none()
         return link.__dict__ if link else None
 
-    async def get_all(self, is_active: Optional[bool], limit: int, offset: int, user_id: int) -> List[dict]:
+    async def get_public_link(self, short_url: str) -> Optional[dict]:
+        """Поля ссылки для редиректа одним Core-запросом, без создания ORM-объекта."""
+        links = Link.__table__
+        result = await self.read_session.execute(
+            select(links.c.id, links.c.original_url, links.c.expires_at, links.c.is_active, links.c.redirect_type)
+            .where(links.c.short_url == short_url)
+        )
+        row = result.first()
+        return dict(row._mapping) if row else None
+
+    async def estimate_link_count(self) -> int:
+        """Оценка числа ссылок по статистике планировщика, без полного сканирования."""
+        result = await self.read_session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": Link.__tablename__}
+        )
+        return max(0, result.scalar() or 0)
+
+    async def stream_short_urls(
+        self, created_since: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[Tuple[str, datetime]]]:
+        """Короткие коды с датой создания пачками; с created_since читается только индекс по created_at."""
+        links = Link.__table__
+        query = select(links.c.short_url, links.c.created_at)
+        if created_since is not None:
+            query = query.where(links.c.created_at >= created_since)
+        result = await self.read_session.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+    async def get_all(
+        self, is_active: Optional[bool], limit: int, offset: int, user_id: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[dict]:
         query = select(Link).where(Link.user_id == user_id)
         if is_active is not None:
-            query = query.where(Link.is_active == is_active)
-        query = query.order_by(Link.created_at.desc()).limit(limit).offset(offset)
-        result = await self.session.execute(query)
+            query = query.where(_active_clause(is_active, datetime.now()))
+        if after is not None:
+            # Продолжение с позиции курсора по индексу (user_id, created_at, id)
+            query = query.where(tuple_(Link.created_at, Link.id) < tuple_(*after))
+        query = query.order_by(Link.created_at.desc(), Link.id.desc()).limit(limit).offset(offset)
+        result = await self.read_session.execute(query)
         return [link.__dict__ for link in result.scalars().all()]
 
+    async def stream_links(
+        self, user_id: int, is_active: Optional[bool], batch_size: int
+    ) -> AsyncIterator[List[dict]]:
+        """Ссылки пользователя пачками через серверный курсор, без загрузки всей выборки в память."""
+        links = Link.__table__
+        query = select(links).where(links.c.user_id == user_id)
+        if is_active is not None:
+            query = query.where(_active_clause(is_active, datetime.now()))
+        result = await self.read_session.stream(
+            query.order_by(links.c.id).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    async def stream_clicks(
+        self, user_id: int, since: Optional[datetime], until: Optional[datetime], batch_size: int
+    ) -> AsyncIterator[List[dict]]:
+        """Сырые клики по ссылкам пользователя пачками; границы передаются значениями,
+        чтобы планировщик отсек секции вне диапазона."""
+        links, clicks = Link.__table__, Click.__table__
+        query = (
+            select(links.c.short_url, clicks.c.clicked_at)
+            .join(links, links.c.id == clicks.c.link_id)
+            .where(links.c.user_id == user_id)
+        )
+        if since is not None:
+            query = query.where(clicks.c.clicked_at >= since)
+        if until is not None:
+            query = query.where(clicks.c.clicked_at < until)
+        result = await self.read_session.stream(
+            query.order_by(clicks.c.clicked_at).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
     async def deactivate(self, short_url: str, user_id: int) -> bool:
         result = await self.session.execute(
             update(Link)
@@ -56,57 +262,232 @@ class LinkRepository(LinkRepositoryInterface):
         return result.rowcount > 0
 
     async def log_click(self, link_id: int) -> None:
-        click = Click(link_id=link_id)
-        self.session.add(click)
+        await self.log_clicks([(link_id, datetime.now())])
+
+    async def log_clicks(self, clicks: List[Tuple[int, datetime]]) -> None:
+        """Записывает пачку кликов и обновляет счетчики одной транзакцией."""
+        if not clicks:
+            return
         await self.session.execute(
-            update(Link)
-            .where(Link.id == link_id)
-            .values(click_count=Link.click_count + 1)
+            insert(Click),
+            [{"link_id": link_id, "clicked_at": clicked_at} for link_id, clicked_at in clicks]
+        )
+        # Один UPDATE на ссылку; сортировка по id исключает взаимные блокировки между воркерами
+        counts = Counter(link_id for link_id, _ in clicks)
+        links = Link.__table__
+        await self.session.execute(
+            update(links)
+            .where(links.c.id == bindparam("link_id"))
+            .values(click_count=links.c.click_count + bindparam("delta")),
+            [{"link_id": link_id, "delta": counts[link_id]} for link_id in sorted(counts)]
+        )
+        await self._increment_buckets(
+            ClickMinuteBucket,
+            Counter((link_id, clicked_at.replace(second=0, microsecond=0)) for link_id, clicked_at in clicks)
+        )
+        await self._increment_buckets(
+            ClickHourBucket,
+            Counter((link_id, clicked_at.replace(minute=0, second=0, microsecond=0)) for link_id, clicked_at in clicks)
         )
         await self.session.commit()
 
-    async def get_stats(self, is_active: Optional[bool], user_id: int) -> List[dict]:
-        last_hour_clicks = func.sum(
-            case(
-                (Click.clicked_at >= func.now() - timedelta(hours=1), 1),
-                else_=0
-            )
+    async def _increment_buckets(self, bucket, counts: Counter) -> None:
+        stmt = pg_insert(bucket).values([
+            {"link_id": link_id, "bucket_start": bucket_start, "clicks": count}
+            for (link_id, bucket_start), count in sorted(counts.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[bucket.link_id, bucket.bucket_start],
+            set_={"clicks": bucket.clicks + stmt.excluded.clicks}
+        )
+        await self.session.execute(stmt)
+
+    async def get_stats(self, is_active: Optional[bool], user_id: int, primary: bool = False) -> List[dict]:
+        now = datetime.now()
+        hour_ago = now - timedelta(hours=1)
+        day_ago = now - timedelta(hours=24)
+        # Сутки = неполный первый час из минутных бакетов + полные часы из часовых
+        first_full_hour = day_ago.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+        last_hour_clicks = _bucket_sum(
+            ClickMinuteBucket, ClickMinuteBucket.bucket_start >= hour_ago
         ).label("last_hour_clicks")
 
-        last_day_clicks = func.sum(
-            case(
-                (Click.clicked_at >= func.now() - timedelta(hours=24), 1),
-                else_=0
+        last_day_clicks = (
+            _bucket_sum(ClickHourBucket, ClickHourBucket.bucket_start >= first_full_hour)
+            + _bucket_sum(
+                ClickMinuteBucket,
+                ClickMinuteBucket.bucket_start >= day_ago,
+                ClickMinuteBucket.bucket_start < first_full_hour
             )
         ).label("last_day_clicks")
 
         query = (
             sql_select(
+                Link.id,
                 Link.short_url,
                 Link.original_url,
+                Link.is_active,
+                Link.expires_at,
                 last_hour_clicks,
                 last_day_clicks
             )
-            .outerjoin(Click, Link.id == Click.link_id)
             .where(Link.user_id == user_id)
-            .group_by(Link.id, Link.short_url, Link.original_url)
         )
 
         if is_active is not None:
-            query = query.where(Link.is_active == is_active)
+            query = query.where(_active_clause(is_active, now))
 
         query = query.order_by(
             last_day_clicks.desc(),
             last_hour_clicks.desc()
         )
 
-        result = await self.session.execute(query)
+        session = self.session if primary else self.read_session
+        result = await session.execute(query)
+        return [dict(row._mapping) for row in result]
+
+    async def get_click_series(self, link_id: int, bucket: str, start: datetime, end: datetime) -> List[dict]:
+        """Клики ссылки по интервалам [start, end) одним запросом; пустые интервалы дают ноль."""
+        step = SERIES_BUCKETS[bucket]
+        source = _click_source(bucket, start)
+        # Единица date_trunc из белого списка, литерал нужен для совпадения выражений в SELECT и GROUP BY
+        truncated = func.date_trunc(literal_column(f"'{bucket}'"), source.bucket_start)
+        counts = (
+            select(truncated.label("bucket_start"), func.sum(source.clicks).label("clicks"))
+            .where(source.link_id == link_id, source.bucket_start >= start, source.bucket_start < end)
+            .group_by(truncated)
+            .subquery()
+        )
+        series = func.generate_series(start, end - step, step).table_valued("bucket_start").render_derived()
+        result = await self.read_session.execute(
+            select(series.c.bucket_start, func.coalesce(counts.c.clicks, 0).label("clicks"))
+            .select_from(series)
+            .outerjoin(counts, counts.c.bucket_start == series.c.bucket_start)
+            .order_by(series.c.bucket_start)
+        )
+        return [dict(row._mapping) for row in result]
+
+    async def get_top_links(
+        self, user_id: int, start: datetime, end: datetime, limit: int, bucket: str = "minute"
+    ) -> List[dict]:
+        """Самые посещаемые ссылки пользователя за окно [start, end), выровненное по bucket."""
+        source = _click_source(bucket, start)
+        clicks = func.sum(source.clicks).label("clicks")
+        result = await self.read_session.execute(
+            select(Link.short_url, Link.original_url, clicks)
+            .join(source, source.link_id == Link.id)
+            .where(Link.user_id == user_id, source.bucket_start >= start, source.bucket_start < end)
+            .group_by(Link.id)
+            .order_by(clicks.desc(), Link.id)
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in result]
+
+    async def get_hot_links(self, since: datetime, limit: int) -> List[dict]:
+        """Действующие ссылки с наибольшим числом кликов начиная с since, с полями для редиректа."""
+        source = _click_source("minute", since)
+        clicks = func.sum(source.clicks)
+        result = await self.read_session.execute(
+            select(
+                Link.short_url, Link.id, Link.original_url, Link.expires_at, Link.is_active, Link.redirect_type
+            )
+            .join(source, source.link_id == Link.id)
+            .where(_active_clause(True, datetime.now()), source.bucket_start >= since)
+            .group_by(Link.id)
+            .order_by(clicks.desc(), Link.id)
+            .limit(limit)
+        )
         return [dict(row._mapping) for row in result]
 
-    async def update_expired_links(self) -> int:
+    async def prune_click_history(self, raw_before: datetime, minute_before: datetime, batch_size: int) -> int:
+        """Удаляет устаревшие клики пачками, чтобы не держать долгие блокировки.
+
+        Граница raw_before выровнена по началу секции: более старые секции к этому
+        моменту уже удалены. Условие по clicked_at стоит и во внешнем DELETE, чтобы
+        планировщик отсек секции и затронул только секцию по умолчанию.
+        """
+        deleted = 0
+        while True:
+            batch = select(Click.id, Click.clicked_at).where(Click.clicked_at < raw_before).limit(batch_size)
+            result = await self.session.execute(
+                delete(Click).where(Click.clicked_at < raw_before, tuple_(Click.id, Click.clicked_at).in_(batch))
+            )
+            await self.session.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        await self.session.execute(
+            delete(ClickMinuteBucket).where(ClickMinuteBucket.bucket_start < minute_before)
+        )
+        await self.session.commit()
+        return deleted
+
+    async def create_click_partition(self, name: str, start: datetime, end: datetime) -> None:
+        """Создает секцию кликов в отдельной транзакции; имя и границы формируются приложением.
+
+        Если в секции по умолчанию уже есть клики из этого диапазона, PostgreSQL
+        не даст создать секцию, поэтому они переносятся в нее перед подключением.
+        """
+        table = Click.__tablename__
+        default = f"{table}_default"
+        bounds = f"FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{end:%Y-%m-%d %H:%M:%S}')"
+        in_range = "clicked_at >= :start AND clicked_at < :end"
+        try:
+            # Новые клики этого диапазона не попадут в секцию по умолчанию между переносом и подключением
+            await self.session.execute(text(f"LOCK TABLE {default} IN ACCESS EXCLUSIVE MODE"))
+            has_rows = await self.session.scalar(
+                text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), {"start": start, "end": end}
+            )
+            if not has_rows:
+                await self.session.execute(
+                    text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES {bounds}")
+                )
+            else:
+                await self.session.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+                await self.session.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    ),
+                    {"start": start, "end": end}
+                )
+                await self.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    async def list_click_partitions(self) -> List[str]:
         result = await self.session.execute(
-            update(Link)
-            .where(and_(Link.is_active == True, Link.expires_at < datetime.now()))
-            .values(is_active=False)
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+            ),
+            {"table": Click.__tablename__}
         )
+        return list(result.scalars())
+
+    async def drop_click_partition(self, name: str) -> None:
+        """Отсоединяет и удаляет секцию целиком, без построчного DELETE и последующего VACUUM."""
+        await self.session.execute(text(f"ALTER TABLE {Click.__tablename__} DETACH PARTITION {name}"))
+        await self.session.execute(text(f"DROP TABLE {name}"))
         await self.session.commit()
+
+    async def update_expired_links(self, batch_size: int) -> int:
+        """Деактивирует истекшие ссылки пачками; заблокированные строки пропускаются."""
+        updated = 0
+        while True:
+            batch = (
+                select(Link.id)
+                .where(Link.is_active == True, Link.expires_at < datetime.now())
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await self.session.execute(
+                update(Link).where(Link.id.in_(batch)).values(is_active=False)
+            )
+            await self.session.commit()
+            updated += result.rowcount
+            if result.rowcount < batch_size:
+                return updated
@@ -3,8 +3,10 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from src.repositories.interfaces.users_repository import UserRepositoryInterface
 from src.models import User
+from src.core.metrics import instrument
 
 
+@instrument("UserRepository")
 class UserRepository(UserRepositoryInterface):
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -1,16 +1,36 @@
 from pydantic import BaseModel, HttpUrl, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
+
+
+RedirectType = Literal[301, 302, 307, 308]
 
 
 class CreateShortUrlRequest(BaseModel):
     original_url: HttpUrl
+    # 301/308 кэшируются браузерами и CDN до истечения ссылки, 302/307 учитываются при каждом переходе
+    redirect_type: RedirectType = 307
 
 
 class CreateShortUrlResponse(BaseModel):
     short_url: str
 
 
+class BulkCreateShortUrlRequest(BaseModel):
+    urls: List[str]
+
+
+class BulkCreateShortUrlItem(BaseModel):
+    original_url: str
+    short_url: Optional[str] = None
+    status: Literal["created", "existing", "conflict", "invalid"]
+    detail: Optional[str] = None
+
+
+class BulkCreateShortUrlResponse(BaseModel):
+    items: List[BulkCreateShortUrlItem]
+
+
 class DeactivateLinkResponse(BaseModel):
     message: str
 
@@ -26,5 +46,6 @@ class LinkResponse(BaseModel):
     expires_at: Optional[datetime]
     click_count: int
     user_id: int
+    redirect_type: int = 307
 
     model_config = ConfigDict(from_attributes=True)
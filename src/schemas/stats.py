@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Literal
 from pydantic import BaseModel, ConfigDict
 
 
@@ -7,4 +9,21 @@ class StatsResponse(BaseModel):
     last_hour_clicks: int
     last_day_clicks: int
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SeriesPoint(BaseModel):
+    bucket_start: datetime
+    clicks: int
+
+
+class StatsSeriesResponse(BaseModel):
+    link: str
+    bucket: Literal["minute", "hour", "day"]
+    points: List[SeriesPoint]
+
+
+class TopLinkResponse(BaseModel):
+    link: str
+    orig_link: str
+    clicks: int
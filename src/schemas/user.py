@@ -8,3 +8,14 @@ class RegisterUserRequest(BaseModel):
 
 class RegisterUserResponse(BaseModel):
     message: str
+
+
+class TokenRequest(BaseModel):
+    username: str
+    password: str
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str
+    expires_in: int
@@ -0,0 +1,61 @@
+"""Production-запуск: python -m src.server.
+
+uvloop и httptools используются, если установлены. Сокет открывается заранее,
+чтобы воркеры принимали соединения с общего сокета, а при SERVER_REUSE_PORT
+новый экземпляр мог занять порт до остановки старого. За доверенным прокси
+(SERVER_FORWARDED_ALLOW_IPS) адрес клиента берется из X-Forwarded-For.
+"""
+import socket
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from src.core.config import settings
+from src.services.warmup import readiness
+
+
+class Server(uvicorn.Server):
+    def handle_exit(self, sig, frame) -> None:
+        # /ready отвечает 503, пока открытые соединения дорабатывают
+        readiness.ready = False
+        super().handle_exit(sig, frame)
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port and hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def build_config() -> uvicorn.Config:
+    return uvicorn.Config(
+        "src.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        proxy_headers=settings.SERVER_PROXY_HEADERS,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+    )
+
+
+def main() -> None:
+    config = build_config()
+    server = Server(config)
+    sock = bind_socket(settings.SERVER_HOST, settings.SERVER_PORT, settings.SERVER_REUSE_PORT)
+    if settings.SERVER_WORKERS > 1:
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run(sockets=[sock])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,57 @@
+import asyncio
+import hashlib
+import hmac
+from typing import Optional
 from passlib.context import CryptContext
 from src.repositories.interfaces.users_repository import UserRepositoryInterface
+from src.cache.base import CacheBackend
+from src.core.config import settings
+from src.core.metrics import instrument
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Ключ хэширования проверенных учетных данных; общий для воркеров с одинаковым SECRET_KEY
+_credentials_key = hashlib.sha256(b"credentials-cache:" + settings.SECRET_KEY.encode()).digest()
 
+
+@instrument("AuthService")
 class AuthService:
-    def __init__(self, user_repository: UserRepositoryInterface):
+    def __init__(self, user_repository: UserRepositoryInterface, credentials_cache: Optional[CacheBackend] = None):
         self.user_repository = user_repository
+        self.credentials_cache = credentials_cache
+
+    @staticmethod
+    def _credentials_digest(username: str, password: str) -> str:
+        """Быстрый ключевой хэш пары логин/пароль; сам пароль в кэше не хранится."""
+        return hashlib.blake2b(
+            f"{username}\0{password}".encode(), key=_credentials_key, digest_size=32
+        ).hexdigest()
+
+    async def invalidate_user(self, username: str) -> None:
+        """Сбрасывает кэш проверенных учетных данных пользователя после его изменения."""
+        if self.credentials_cache is not None:
+            await self.credentials_cache.delete(username)
 
     async def register_user(self, username: str, password: str) -> dict:
-        password_hash = pwd_context.hash(password)
+        # bcrypt выполняется в пуле потоков, чтобы не блокировать event loop
+        password_hash = await asyncio.to_thread(pwd_context.hash, password)
         user = await self.user_repository.create(username, password_hash)
+        await self.invalidate_user(username)
         return {"message": f"User {user['username']} successfully registered"}
 
     async def authenticate_user(self, username: str, password: str) -> dict:
+        digest = self._credentials_digest(username, password)
+        if self.credentials_cache is not None:
+            cached = await self.credentials_cache.get(username)
+            if cached is not None and hmac.compare_digest(cached["digest"], digest):
+                return dict(cached["user"])
+
         user = await self.user_repository.get_by_username(username)
         if not user:
             raise ValueError("User not found")
-        if not pwd_context.verify(password, user["password_hash"]):
+        if not await asyncio.to_thread(pwd_context.verify, password, user["password_hash"]):
             raise ValueError("Incorrect pair login/password")
-        return {"id": user["id"], "username": user["username"]}
+        result = {"id": user["id"], "username": user["username"]}
+        if self.credentials_cache is not None:
+            await self.credentials_cache.set(username, {"digest": digest, "user": result})
+        return dict(result)
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Фоновая задача, периодически выполняемая в рамках жизненного цикла приложения."""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[Any]], interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            await asyncio.sleep(self.interval)
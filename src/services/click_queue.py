@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.core.config import settings
+from src.db.database import async_session
+from src.repositories.links_repository import LinkRepository
+
+logger = logging.getLogger(__name__)
+
+ClickListener = Callable[[List[Tuple[int, datetime]]], None]
+
+
+class ClickQueue:
+    """Буфер кликов с отложенной пакетной записью в базу данных."""
+
+    def __init__(
+        self, session_factory: async_sessionmaker,
+        batch_size: int, flush_interval: float, max_size: int
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.dropped = 0
+        self._buffer: List[Tuple[int, datetime]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._write_task: Optional[asyncio.Task] = None
+        self._listeners: List[ClickListener] = []
+        # Запись пакета и чтения под holding_writes не пересекаются; ожидающая запись
+        # не пропускает новые чтения вперед, иначе непрерывные чтения ее никогда не допустят
+        self._idle = asyncio.Condition()
+        self._writing = False
+        self._write_pending = False
+        self._readers = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_listener(self, listener: ClickListener) -> None:
+        """Подписывает на пакеты кликов, успешно записанные в базу."""
+        self._listeners.append(listener)
+
+    @asynccontextmanager
+    async def holding_writes(self) -> AsyncIterator[None]:
+        """Приостанавливает запись пакетов на время чтения.
+
+        Чтение с основной базы видит ровно те пакеты, о которых подписчики уже
+        уведомлены; остальные будут зафиксированы и переданы подписчикам после выхода.
+        Ожидающая запись пропускается вперед новых чтений.
+        """
+        async with self._idle:
+            await self._idle.wait_for(lambda: not self._writing and not self._write_pending)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._idle:
+                self._readers -= 1
+                self._idle.notify_all()
+
+    def put(self, link_id: int) -> None:
+        """Ставит клик в очередь, не дожидаясь записи."""
+        if len(self._buffer) >= self.max_size:
+            self.dropped += 1
+            return
+        self._buffer.append((link_id, datetime.now()))
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу и записывает оставшиеся клики."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._write_task is not None:
+            await self._write_task
+        await self.flush()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: self.batch_size]
+            # Отмена фоновой задачи не должна прерывать уже начатую запись
+            self._write_task = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._write_task)
+            self._write_task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _write(self, batch: List[Tuple[int, datetime]]) -> None:
+        async with self._idle:
+            self._write_pending = True
+            try:
+                await self._idle.wait_for(lambda: not self._readers)
+            finally:
+                self._write_pending = False
+                self._idle.notify_all()
+            self._writing = True
+        try:
+            await self._write_batch(batch)
+        finally:
+            async with self._idle:
+                self._writing = False
+                self._idle.notify_all()
+
+    async def _write_batch(self, batch: List[Tuple[int, datetime]]) -> None:
+        try:
+            async with self.session_factory() as session:
+                await LinkRepository(session).log_clicks(batch)
+        except Exception:
+            logger.exception("Failed to write %d clicks", len(batch))
+            return
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception:
+                logger.exception("Click listener failed")
+
+
+click_queue = ClickQueue(
+    async_session,
+    batch_size=settings.CLICK_QUEUE_BATCH_SIZE,
+    flush_interval=settings.CLICK_QUEUE_FLUSH_INTERVAL_SECONDS,
+    max_size=settings.CLICK_QUEUE_MAX_SIZE,
+)
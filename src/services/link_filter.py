@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Callable, Iterable, List, Optional
+from src.cache.bloom import BloomFilter
+from src.db.notifications import NotificationCallback, Subscription
+from src.repositories.interfaces.links_repository import LinkRepositoryInterface
+
+logger = logging.getLogger(__name__)
+
+RepositoryFactory = Callable[[bool], AsyncContextManager[LinkRepositoryInterface]]
+Subscriber = Callable[[NotificationCallback], AsyncContextManager[Subscription]]
+
+
+class LinkFilter:
+    """Множество существующих коротких кодов для отказа в редиректе без запроса к базе.
+
+    Коды, созданные любым воркером, приходят уведомлением при фиксации вставки.
+    Отрицательный ответ дается, только пока подписка жива и фильтр догнал базу;
+    в остальное время все коды считаются возможными и проверяются запросом.
+    """
+
+    def __init__(
+        self, capacity: int, error_rate: float, lookback: float,
+        repository_factory: RepositoryFactory, subscriber: Optional[Subscriber] = None,
+        reconnect_interval: float = 1.0, keepalive: float = 30.0, batch_size: int = 10000
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lookback = timedelta(seconds=lookback)
+        self.repository_factory = repository_factory
+        self.subscriber = subscriber
+        self.reconnect_interval = reconnect_interval
+        self.keepalive = keepalive
+        self.batch_size = batch_size
+        self.rejected = 0
+        self._bloom: Optional[BloomFilter] = None
+        self._watermark: Optional[datetime] = None
+        self._synced = False
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Коды, пришедшие во время перестроения, добавляются и в новый фильтр
+        self._pending: Optional[List[str]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._bloom is not None
+
+    @property
+    def synced(self) -> bool:
+        return self._synced
+
+    async def load(self) -> None:
+        """Строит фильтр по всем коротким кодам; до синхронизации любой код считается возможным."""
+        async with self._lock:
+            try:
+                await self._rebuild()
+            except Exception:
+                logger.exception("Failed to load short code filter")
+
+    async def _rebuild(self) -> None:
+        async with self.repository_factory(True) as repository:
+            count = await repository.estimate_link_count()
+        bloom = BloomFilter(max(self.capacity, count * 2), self.error_rate)
+        self._pending = []
+        try:
+            await self._read(bloom, None, True)
+            # Полная загрузка шла с реплики; хвост с основной базы покрывает ее отставание
+            await self._read(bloom, self._since(), False)
+            for short_url in self._pending:
+                bloom.add(short_url)
+        finally:
+            self._pending = None
+        self._bloom = bloom
+        logger.info("Short code filter loaded: %d codes, %d bytes", len(bloom), bloom.memory_bytes)
+
+    async def _read(self, bloom: BloomFilter, since: Optional[datetime], read_only: bool) -> None:
+        async with self.repository_factory(read_only) as repository:
+            async for batch in repository.stream_short_urls(since, self.batch_size):
+                for short_url, created_at in batch:
+                    if short_url not in bloom:
+                        bloom.add(short_url)
+                    if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                        self._watermark = created_at
+
+    def _since(self) -> Optional[datetime]:
+        # Запас по времени покрывает транзакции, зафиксированные позже своего created_at
+        return self._watermark - self.lookback if self._watermark is not None else None
+
+    async def _catch_up(self) -> None:
+        """Дочитывает с основной базы коды, созданные до подписки, но после загрузки фильтра."""
+        async with self._lock:
+            if self._bloom is None:
+                await self._rebuild()
+            else:
+                await self._read(self._bloom, self._since(), False)
+
+    def start(self) -> None:
+        if self.subscriber is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._rebuild_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._rebuild_task = None
+        self._synced = False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.subscriber(self._on_notification) as subscription:
+                    await self._catch_up()
+                    self._synced = True
+                    await subscription.wait_closed(self.keepalive)
+                logger.warning("Short code notifications connection closed, resubscribing")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Short code notifications failed, resubscribing")
+            finally:
+                self._synced = False
+            await asyncio.sleep(self.reconnect_interval)
+
+    def _on_notification(self, payload: str) -> None:
+        self.add(payload.split(","))
+
+    def add(self, short_urls: Iterable[str]) -> None:
+        bloom = self._bloom
+        if bloom is None:
+            return
+        for short_url in short_urls:
+            bloom.add(short_url)
+            if self._pending is not None:
+                self._pending.append(short_url)
+        if len(bloom) > bloom.capacity and self._rebuild_task is None:
+            # Переполненный фильтр остается верным, но чаще ошибается; перестраивается вне пути запроса
+            self._rebuild_task = asyncio.create_task(self._rebuild_in_background())
+
+    async def _rebuild_in_background(self) -> None:
+        try:
+            async with self._lock:
+                await self._rebuild()
+        except Exception:
+            logger.exception("Failed to rebuild short code filter")
+        finally:
+            self._rebuild_task = None
+
+    async def might_exist(self, short_url: str) -> bool:
+        """False означает, что ссылки с таким кодом точно нет."""
+        if not self._synced or self._bloom is None or short_url in self._bloom:
+            return True
+        self.rejected += 1
+        return False
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        if bloom is None:
+            return {
+                "size": 0, "memory_bytes": 0, "false_positive_rate": 0.0,
+                "rejected": self.rejected, "synced": self._synced,
+            }
+        return {
+            "size": len(bloom),
+            "memory_bytes": bloom.memory_bytes,
+            "false_positive_rate": bloom.false_positive_rate,
+            "rejected": self.rejected,
+            "synced": self._synced,
+        }
@@ -1,13 +1,128 @@
-import uuid
+import base64
+import hashlib
+import json
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 from src.repositories.interfaces.links_repository import LinkRepositoryInterface
+from src.models.click_bucket import MINUTE_BUCKETS_RETENTION, SERIES_BUCKETS
+from src.cache.base import CacheBackend
+from src.services.click_queue import ClickQueue
+from src.services.link_filter import LinkFilter
+from src.services.short_codes import ShortCodeGenerator, short_code_generator
+from src.services.stats_snapshots import StatsSnapshots, stats_etag
 from src.core.config import settings
+from src.core.metrics import instrument
 
+# Поля ссылки, достаточные для редиректа
+CACHED_LINK_FIELDS = ("id", "original_url", "expires_at", "is_active", "redirect_type")
 
+LINK_NOT_FOUND = "Link not found"
+LINK_EXPIRED = "Link has expired"
+LINK_INACTIVE = "Link is inactive"
+
+
+async def cache_link(link_cache: CacheBackend, short_url: str, link: dict) -> None:
+    """Кладет ссылку в кэш, не дольше чем до истечения ее срока действия."""
+    ttl = None
+    if link["expires_at"] is not None:
+        ttl = (link["expires_at"] - datetime.now()).total_seconds()
+    await link_cache.set(short_url, {field: link[field] for field in CACHED_LINK_FIELDS}, ttl)
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Канонический вид URL для дедупликации: схема и хост в нижнем регистре, без порта по умолчанию.
+
+    Фрагмент сохраняется: в одностраничных приложениях он адресует разные страницы.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ""
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if parts.port is not None and DEFAULT_PORTS.get(scheme) != parts.port:
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, parts.fragment))
+
+
+def hash_url(url: str, redirect_type: int = 307) -> bytes:
+    """Хеш фиксированной длины для уникального индекса вместо индекса по самому URL.
+
+    Тип редиректа входит в хеш: ссылка на тот же URL с другим кодом ответа - другая ссылка.
+    """
+    return hashlib.sha256(f"{redirect_type} {normalize_url(url)}".encode()).digest()
+
+
+def encode_cursor(link: dict) -> str:
+    """Непрозрачный курсор пагинации из (created_at, id) последней ссылки страницы."""
+    payload = json.dumps([link["created_at"].isoformat(), link["id"]]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, link_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(link_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def _truncate_to_bucket(moment: datetime, bucket: str) -> datetime:
+    moment = moment.replace(second=0, microsecond=0)
+    if bucket in ("hour", "day"):
+        moment = moment.replace(minute=0)
+    if bucket == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _stats_window(start: Optional[datetime], end: Optional[datetime], bucket: str) -> Tuple[datetime, datetime]:
+    """Окно статистики, по умолчанию последние сутки, расширенное до границ интервалов."""
+    end = end or datetime.now()
+    start = start or end - timedelta(days=1)
+    if start >= end:
+        raise ValueError("Invalid time range")
+    if _truncate_to_bucket(end, bucket) != end:
+        end = _truncate_to_bucket(end, bucket) + SERIES_BUCKETS[bucket]
+    return _truncate_to_bucket(start, bucket), end
+
+
+@instrument("LinkService")
 class LinkService:
-    def __init__(self, link_repository: LinkRepositoryInterface):
+    def __init__(
+        self, link_repository: LinkRepositoryInterface,
+        link_cache: Optional[CacheBackend] = None,
+        click_queue: Optional[ClickQueue] = None,
+        code_generator: Optional[ShortCodeGenerator] = None,
+        link_filter: Optional[LinkFilter] = None,
+        stats_snapshots: Optional[StatsSnapshots] = None
+    ):
         self.link_repository = link_repository
+        self.link_cache = link_cache
+        self.click_queue = click_queue
+        self.code_generator = code_generator or short_code_generator
+        self.link_filter = link_filter
+        self.stats_snapshots = stats_snapshots
+
+    def _links_created(self, short_urls: Iterable[str], user: dict) -> None:
+        if self.link_filter is not None:
+            self.link_filter.add(short_urls)
+        if self.stats_snapshots is not None:
+            self.stats_snapshots.invalidate(user["id"])
+
+    async def _cache_link(self, short_url: str, link: dict) -> None:
+        if self.link_cache is not None:
+            await cache_link(self.link_cache, short_url, link)
+
+    async def _invalidate_link(self, short_url: str) -> None:
+        if self.link_cache is not None:
+            await self.link_cache.delete(short_url)
 
     async def _validate_link(
         self, link: Optional[dict], short_url: str,
@@ -17,14 +132,14 @@ class LinkService:
         if not link:
             message = f"Public link not found: {short_url}" if user is None \
                 else f"Link not found: {short_url} for user {user['username']}"
-            raise ValueError("Link not found")
-        if link["expires_at"] < datetime.now():
-            await self.update_expired_links()
-            raise ValueError("Link has expired")
+            raise ValueError(LINK_NOT_FOUND)
+        if link["expires_at"] is not None and link["expires_at"] < datetime.now():
+            await self._invalidate_link(short_url)
+            raise ValueError(LINK_EXPIRED)
         if not link["is_active"]:
             message = f"Public link is inactive: {short_url}" if user is None \
                 else f"Link is inactive: {short_url} for user {user['username']}"
-            raise ValueError("Link is inactive")
+            raise ValueError(LINK_INACTIVE)
         return link
 
     async def get_by_short_url(self, short_url: str, user: dict) -> dict:
@@ -32,42 +147,261 @@ class LinkService:
         return await self._validate_link(link, short_url, user)
 
     async def get_by_short_url_public(self, short_url: str) -> dict:
-        link = await self.link_repository.get_by_short_url(short_url)
+        link = await self.link_cache.get(short_url) if self.link_cache is not None else None
+        if link is None:
+            link = await self.link_repository.get_public_link(short_url)
+            if link:
+                await self._cache_link(short_url, link)
         return await self._validate_link(link, short_url)
 
-    async def create_short_url(self, original_url: str, user: dict) -> str:
-        short_url = str(uuid.uuid4())[: settings.SHORT_URL_LENGTH]
+    async def create_short_url(self, original_url: str, user: dict, redirect_type: int = 307) -> str:
         expires_at = datetime.now() + timedelta(days=settings.DEFAULT_LINK_EXPIRY_DAYS)
-        link = await self.link_repository.create(original_url, short_url, expires_at, user["id"])
+        # Коллизия возможна для случайных кодов и для кодов, созданных до перехода на счетчик
+        for attempt in range(settings.SHORT_URL_MAX_ATTEMPTS):
+            short_url, = await self.code_generator.generate(self.link_repository)
+            try:
+                link = await self.link_repository.create(
+                    original_url, short_url, expires_at, user["id"], redirect_type
+                )
+                break
+            except ValueError as e:
+                if "already exists" not in str(e).lower() or attempt == settings.SHORT_URL_MAX_ATTEMPTS - 1:
+                    raise
+        self._links_created([link["short_url"]], user)
         return f"http://localhost:8000/{link['short_url']}"
 
-    async def get_all_links(
-        self, is_active: Optional[bool], limit: int, offset: int, user: dict
-    ) -> List[dict]:
-        await self.link_repository.update_expired_links()
+    async def get_or_create_short_url(
+        self, original_url: str, user: dict, redirect_type: int = 307
+    ) -> Tuple[str, bool]:
+        """Возвращает активную ссылку пользователя на тот же URL либо создает новую.
+
+        Второй элемент результата - была ли ссылка создана.
+        """
+        url_hash = hash_url(original_url, redirect_type)
+        existing = await self.link_repository.get_by_url_hashes(user["id"], [url_hash])
+        if existing and (existing[0]["expires_at"] is None or existing[0]["expires_at"] >= datetime.now()):
+            return f"http://localhost:8000/{existing[0]['short_url']}", False
+
+        expires_at = datetime.now() + timedelta(days=settings.DEFAULT_LINK_EXPIRY_DAYS)
+        for attempt in range(settings.SHORT_URL_MAX_ATTEMPTS):
+            short_url, = await self.code_generator.generate(self.link_repository)
+            try:
+                link, created = await self.link_repository.create_deduplicated(
+                    original_url, url_hash, short_url, expires_at, user["id"], redirect_type
+                )
+                break
+            except ValueError as e:
+                if "already exists" not in str(e).lower() or attempt == settings.SHORT_URL_MAX_ATTEMPTS - 1:
+                    raise
+        if created:
+            self._links_created([link["short_url"]], user)
+        return f"http://localhost:8000/{link['short_url']}", created
+
+    async def _insert_many(
+        self, original_urls: List[str], pending: List[int], user: dict,
+        url_hashes: Optional[List[bytes]] = None
+    ) -> Dict[int, Tuple[str, bool]]:
+        """Вставляет ссылки с повторами при конфликте кодов.
+
+        Возвращает по индексам URL код ссылки и признак того, что она создана, а не найдена.
+        """
+        expires_at = datetime.now() + timedelta(days=settings.DEFAULT_LINK_EXPIRY_DAYS)
+        results: Dict[int, Tuple[str, bool]] = {}
+        for _ in range(settings.SHORT_URL_MAX_ATTEMPTS):
+            if not pending:
+                break
+            codes = await self.code_generator.generate(self.link_repository, len(pending))
+            batch, seen = [], set()
+            for index, code in zip(pending, codes):
+                if code not in seen:
+                    seen.add(code)
+                    batch.append((index, code))
+            created = await self.link_repository.create_many(
+                [(original_urls[index], code) for index, code in batch], expires_at, user["id"],
+                [url_hashes[index] for index, _ in batch] if url_hashes is not None else None
+            )
+            created_codes = {link["short_url"] for link in created}
+            if created_codes:
+                self._links_created(created_codes, user)
+            for index, code in batch:
+                if code in created_codes:
+                    results[index] = (code, True)
+            pending = [index for index in pending if index not in results]
+            if url_hashes is not None and pending:
+                # Строка не вставляется и тогда, когда ссылку на этот URL успел создать параллельный запрос
+                for index, code in (await self._find_existing(pending, url_hashes, user)).items():
+                    results[index] = (code, False)
+                pending = [index for index in pending if index not in results]
+        return results
+
+    async def _find_existing(self, indexes: List[int], url_hashes: List[bytes], user: dict) -> Dict[int, str]:
+        """Коды действующих активных ссылок пользователя для URL с заданными индексами."""
+        if not indexes:
+            return {}
+        now = datetime.now()
+        existing = {
+            link["url_hash"]: link["short_url"]
+            for link in await self.link_repository.get_by_url_hashes(
+                user["id"], list({url_hashes[index] for index in indexes})
+            )
+            if link["expires_at"] is None or link["expires_at"] >= now
+        }
+        return {index: existing[url_hashes[index]] for index in indexes if url_hashes[index] in existing}
+
+    async def create_short_urls(self, original_urls: List[str], user: dict) -> List[Optional[str]]:
+        """Создает ссылки пачкой; для не созданных из-за конфликта кодов возвращает None."""
+        results = await self._insert_many(original_urls, list(range(len(original_urls))), user)
+        return [
+            f"http://localhost:8000/{results[index][0]}" if index in results else None
+            for index in range(len(original_urls))
+        ]
+
+    async def get_or_create_short_urls(
+        self, original_urls: List[str], user: dict
+    ) -> List[Optional[Tuple[str, bool]]]:
+        """Как create_short_urls, но для URL с действующей ссылкой пользователя возвращает ее.
+
+        Повторы URL внутри пачки получают ссылку первого вхождения.
+        """
+        url_hashes = [hash_url(url) for url in original_urls]
+        first_index: Dict[bytes, int] = {}
+        for index, url_hash in enumerate(url_hashes):
+            first_index.setdefault(url_hash, index)
+        leaders = list(first_index.values())
+
+        existing = await self._find_existing(leaders, url_hashes, user)
+        results = {index: (code, False) for index, code in existing.items()}
+        results.update(await self._insert_many(
+            original_urls, [index for index in leaders if index not in results], user, url_hashes
+        ))
+        short_urls: List[Optional[Tuple[str, bool]]] = []
+        for index, url_hash in enumerate(url_hashes):
+            result = results.get(first_index[url_hash])
+            if result is None:
+                short_urls.append(None)
+            else:
+                short_urls.append((f"http://localhost:8000/{result[0]}", result[1] and index == first_index[url_hash]))
+        return short_urls
 
-        links = await self.link_repository.get_all(is_active, limit, offset, user["id"])
+    async def get_all_links(
+        self, is_active: Optional[bool], limit: int, offset: int, user: dict,
+        after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Возвращает страницу ссылок и курсор следующей страницы, если она может существовать."""
+        links = await self.link_repository.get_all(
+            is_active, limit, offset, user["id"], decode_cursor(after) if after else None
+        )
+        next_cursor = encode_cursor(links[-1]) if links and len(links) == limit else None
+        now = datetime.now()
         return [
             {
                 **link,
-                "short_url": f"http://localhost:8000/{link['short_url']}"
+                "short_url": f"http://localhost:8000/{link['short_url']}",
+                # Истекшая ссылка неактивна, даже если фоновая деактивация еще не прошла
+                "is_active": link["is_active"] and (link["expires_at"] is None or link["expires_at"] >= now),
             }
             for link in links
+        ], next_cursor
+
+    async def export_links(self, is_active: Optional[bool], user: dict) -> AsyncIterator[List[dict]]:
+        """Все ссылки пользователя пачками в том же виде, что и в списке ссылок."""
+        async for links in self.link_repository.stream_links(user["id"], is_active, settings.EXPORT_BATCH_SIZE):
+            now = datetime.now()
+            yield [
+                {
+                    **link,
+                    "short_url": f"http://localhost:8000/{link['short_url']}",
+                    "is_active": link["is_active"] and (link["expires_at"] is None or link["expires_at"] >= now),
+                }
+                for link in links
+            ]
+
+    async def export_clicks(
+        self, since: Optional[datetime], until: Optional[datetime], user: dict
+    ) -> AsyncIterator[List[dict]]:
+        """Сырые клики по ссылкам пользователя пачками в порядке времени."""
+        async for clicks in self.link_repository.stream_clicks(user["id"], since, until, settings.EXPORT_BATCH_SIZE):
+            yield [{**click, "short_url": f"http://localhost:8000/{click['short_url']}"} for click in clicks]
+
+    async def get_click_series(
+        self, short_url: str, bucket: str, start: Optional[datetime], end: Optional[datetime], user: dict
+    ) -> dict:
+        """Клики ссылки по интервалам; окно расширяется до границ интервалов."""
+        if bucket not in SERIES_BUCKETS:
+            raise ValueError("Invalid bucket")
+        start, end = _stats_window(start, end, bucket)
+        if bucket == "minute" and start < datetime.now() - MINUTE_BUCKETS_RETENTION:
+            raise ValueError("Minute buckets are only available for the last 24 hours")
+        if (end - start) // SERIES_BUCKETS[bucket] > settings.STATS_SERIES_MAX_POINTS:
+            raise ValueError(f"Too many buckets, limit is {settings.STATS_SERIES_MAX_POINTS}")
+
+        link = await self.link_repository.get_by_short_url(short_url, user["id"])
+        if not link:
+            raise ValueError(LINK_NOT_FOUND)
+        return {
+            "link": f"http://localhost:8000/{short_url}",
+            "bucket": bucket,
+            "points": await self.link_repository.get_click_series(link["id"], bucket, start, end),
+        }
+
+    async def get_top_links(
+        self, start: Optional[datetime], end: Optional[datetime], limit: int, user: dict
+    ) -> List[dict]:
+        if not 0 < limit <= settings.STATS_TOP_MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {settings.STATS_TOP_MAX_LIMIT}")
+        # Окна старше срока хранения минутных бакетов считаются по часовым и выравниваются по часу
+        bucket = "minute"
+        if start is not None and start < datetime.now() - MINUTE_BUCKETS_RETENTION:
+            bucket = "hour"
+        start, end = _stats_window(start, end, bucket)
+        top = await self.link_repository.get_top_links(user["id"], start, end, limit, bucket)
+        return [
+            {
+                "link": f"http://localhost:8000/{link['short_url']}",
+                "orig_link": link["original_url"],
+                "clicks": link["clicks"],
+            }
+            for link in top
         ]
 
     async def deactivate_link(self, short_url: str, user: dict) -> dict:
         success = await self.link_repository.deactivate(short_url, user["id"])
         if not success:
             raise ValueError("Link not found or already deactivated")
+        await self._invalidate_link(short_url)
+        if self.stats_snapshots is not None:
+            self.stats_snapshots.invalidate(user["id"])
         return {"message": f"Link {short_url} deactivated"}
 
     async def log_click(self, short_url: str) -> None:
+        # Повторный поиск ссылки обслуживается кэшем
         link = await self.get_by_short_url_public(short_url)
-        await self.link_repository.log_click(link["id"])
+        if self.click_queue is not None and self.click_queue.running:
+            self.click_queue.put(link["id"])
+        else:
+            await self.link_repository.log_click(link["id"])
 
-    async def get_stats(self, is_active: Optional[bool], user: dict) -> List[dict]:
-        await self.link_repository.update_expired_links()
-        stats = await self.link_repository.get_stats(is_active, user["id"])
+    async def get_stats(
+        self, is_active: Optional[bool], user: dict, limit: Optional[int] = None
+    ) -> Tuple[List[dict], str]:
+        """Статистика ссылок по убыванию кликов за сутки и ее ETag.
+
+        При включенных снимках повторные запросы не обращаются к базе, пока снимок свеж.
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be positive")
+        if self.stats_snapshots is not None:
+            # Снимок дополняется кликами после записи, поэтому строится по основной базе: реплика
+            # может еще не видеть пакет, о котором очередь уже сообщила
+            snapshot = await self.stats_snapshots.get(
+                user["id"], lambda: self.link_repository.get_stats(None, user["id"], primary=True)
+            )
+            stats, etag = snapshot.view(is_active, limit)
+        else:
+            stats = await self.link_repository.get_stats(is_active, user["id"])
+            if limit is not None:
+                stats = stats[:limit]
+            etag = stats_etag(stats)
         return [
             {
                 "link": f"http://localhost:8000/{stat['short_url']}",
@@ -76,7 +410,4 @@ class LinkService:
                 "last_day_clicks": stat["last_day_clicks"],
             }
             for stat in stats
-        ]
-
-    async def update_expired_links(self) -> None:
-        await self.link_repository.update_expired_links()
+        ], etag
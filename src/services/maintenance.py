@@ -0,0 +1,68 @@
+import logging
+from datetime import datetime, timedelta
+from src.core.config import settings
+from src.db.database import async_session, replica_router
+from src.db.partitions import partition_bounds, partition_ranges, partition_start, next_partition_start
+from src.models.click import Click
+from src.models.click_bucket import MINUTE_BUCKETS_RETENTION
+from src.repositories.links_repository import LinkRepository
+from src.services.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+def _retained_from(now: datetime) -> datetime:
+    """Начало самой старой хранимой секции кликов: хранится не меньше CLICK_RETENTION_DAYS."""
+    return partition_start(now - timedelta(days=settings.CLICK_RETENTION_DAYS), settings.CLICK_PARTITION_INTERVAL)
+
+
+def _upcoming_partitions(now: datetime) -> list:
+    """Текущая секция кликов и CLICK_PARTITIONS_AHEAD следующих."""
+    interval = settings.CLICK_PARTITION_INTERVAL
+    end = partition_start(now, interval)
+    for _ in range(settings.CLICK_PARTITIONS_AHEAD + 1):
+        end = next_partition_start(end, interval)
+    return partition_ranges(Click.__tablename__, now, end, interval)
+
+
+async def prune_click_history() -> int:
+    """Ведет секции кликов: создает будущие, удаляет устаревшие, затем чистит минутные бакеты."""
+    now = datetime.now()
+    raw_before = _retained_from(now)
+    minute_before = min(raw_before, now - MINUTE_BUCKETS_RETENTION)
+    async with async_session() as session:
+        repository = LinkRepository(session)
+        existing = set(await repository.list_click_partitions())
+        for name, start, end in _upcoming_partitions(now):
+            if name in existing:
+                continue
+            # Каждая секция в своей транзакции: сбой одной не останавливает удаление устаревших
+            try:
+                await repository.create_click_partition(name, start, end)
+            except Exception:
+                logger.exception("Failed to create click partition %s", name)
+        for name in sorted(existing):
+            bounds = partition_bounds(Click.__tablename__, name)
+            if bounds is not None and bounds[1] <= raw_before:
+                await repository.drop_click_partition(name)
+        return await repository.prune_click_history(
+            raw_before, minute_before, settings.MAINTENANCE_BATCH_SIZE
+        )
+
+
+async def deactivate_expired_links() -> int:
+    async with async_session() as session:
+        return await LinkRepository(session).update_expired_links(settings.MAINTENANCE_BATCH_SIZE)
+
+
+click_retention_task = PeriodicTask(
+    "click-retention", prune_click_history, settings.CLICK_RETENTION_INTERVAL_SECONDS
+)
+
+link_expiry_task = PeriodicTask(
+    "link-expiry", deactivate_expired_links, settings.LINK_EXPIRY_SWEEP_INTERVAL_SECONDS
+)
+
+replica_health_task = PeriodicTask(
+    "replica-health", replica_router.check_health, settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+)
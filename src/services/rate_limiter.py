@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from src.core.config import settings
+
+
+class TokenBuckets:
+    """Ведра токенов по ключам в памяти процесса.
+
+    Токены пополняются лениво при обращении. Ключи разложены по шардам, каждый
+    шард - LRU ограниченного размера: вытесняются давно неактивные ключи, ведра
+    которых и так успели бы наполниться.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int, shards: int = 16):
+        self.rate = rate
+        self.burst = burst
+        self.rejected = 0
+        self._shard_size = max(1, max_keys // shards)
+        self._shards = [OrderedDict() for _ in range(shards)]
+
+    def acquire(self, key: Hashable) -> float:
+        """Списывает токен; 0, если запрос разрешен, иначе секунды до появления токена."""
+        shard: "OrderedDict[Hashable, Tuple[float, float]]" = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        state = shard.get(key)
+        if state is None:
+            tokens = self.burst
+            if len(shard) >= self._shard_size:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+            tokens = min(self.burst, state[0] + (now - state[1]) * self.rate)
+        if tokens >= 1:
+            shard[key] = (tokens - 1, now)
+            return 0.0
+        shard[key] = (tokens, now)
+        self.rejected += 1
+        return (1 - tokens) / self.rate
+
+    def stats(self) -> dict:
+        return {"size": sum(len(shard) for shard in self._shards), "rejected": self.rejected}
+
+
+class RateLimiter:
+    """Лимиты запросов по областям: client и redirect - по IP, user - по пользователю, alias - по IP и коду."""
+
+    def __init__(self, buckets: Dict[str, TokenBuckets]):
+        self.buckets = buckets
+
+    def acquire(self, scope: str, key: Hashable) -> float:
+        """0, если запрос разрешен или лимит области не задан, иначе значение Retry-After в секундах."""
+        buckets = self.buckets.get(scope)
+        return buckets.acquire(key) if buckets is not None else 0.0
+
+    def stats(self) -> Dict[str, dict]:
+        return {scope: buckets.stats() for scope, buckets in self.buckets.items()}
+
+
+def _create_rate_limiter() -> Optional[RateLimiter]:
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    limits = {
+        "client": (settings.RATE_LIMIT_CLIENT_PER_SECOND, settings.RATE_LIMIT_CLIENT_BURST),
+        "user": (settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST),
+        "redirect": (settings.RATE_LIMIT_REDIRECT_PER_SECOND, settings.RATE_LIMIT_REDIRECT_BURST),
+        "alias": (settings.RATE_LIMIT_ALIAS_PER_SECOND, settings.RATE_LIMIT_ALIAS_BURST),
+    }
+    # Нулевая скорость отключает лимит области
+    return RateLimiter({
+        scope: TokenBuckets(rate, burst, settings.RATE_LIMIT_MAX_KEYS, settings.RATE_LIMIT_SHARDS)
+        for scope, (rate, burst) in limits.items() if rate > 0
+    })
+
+
+rate_limiter = _create_rate_limiter()
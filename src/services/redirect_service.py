@@ -0,0 +1,75 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+from src.cache import link_cache
+from src.cache.base import CacheBackend
+from src.core.config import settings
+from src.db.database import async_session, engine, replica_router
+from src.db.notifications import listen
+from src.repositories.interfaces.links_repository import LinkRepositoryInterface
+from src.repositories.links_repository import LinkRepository
+from src.services.click_queue import ClickQueue, click_queue
+from src.services.link_filter import LinkFilter, RepositoryFactory
+from src.services.links_service import LINK_EXPIRED, LINK_INACTIVE, LINK_NOT_FOUND, cache_link
+
+
+@asynccontextmanager
+async def open_link_repository(read_only: bool) -> AsyncIterator[LinkRepositoryInterface]:
+    """Репозиторий на отдельной сессии из пула; чтение обслуживает реплика, если она доступна."""
+    bind = replica_router.pick() if read_only else replica_router.primary
+    async with async_session(bind=bind) as session:
+        yield LinkRepository(session)
+
+
+class RedirectService:
+    """Публичный редирект без графа зависимостей: кэш, при промахе один запрос к базе.
+
+    Проверки те же, что в LinkService.get_by_short_url_public, но результат
+    возвращается значением, без исключений.
+    """
+
+    def __init__(
+        self, link_cache: CacheBackend, click_queue: Optional[ClickQueue],
+        repository_factory: RepositoryFactory = open_link_repository,
+        link_filter: Optional[LinkFilter] = None
+    ):
+        self.link_cache = link_cache
+        self.click_queue = click_queue
+        self.repository_factory = repository_factory
+        self.link_filter = link_filter
+
+    async def resolve(self, short_url: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Возвращает ссылку либо причину, по которой редирект невозможен."""
+        link = await self.link_cache.get(short_url)
+        if link is None:
+            if self.link_filter is not None and not await self.link_filter.might_exist(short_url):
+                return None, LINK_NOT_FOUND
+            async with self.repository_factory(True) as repository:
+                link = await repository.get_public_link(short_url)
+            if link is None:
+                return None, LINK_NOT_FOUND
+            await cache_link(self.link_cache, short_url, link)
+        if link["expires_at"] is not None and link["expires_at"] < datetime.now():
+            await self.link_cache.delete(short_url)
+            return None, LINK_EXPIRED
+        if not link["is_active"]:
+            return None, LINK_INACTIVE
+        return link, None
+
+    async def record_click(self, link: dict) -> None:
+        if self.click_queue is not None and self.click_queue.running:
+            self.click_queue.put(link["id"])
+            return
+        async with self.repository_factory(False) as repository:
+            await repository.log_click(link["id"])
+
+
+link_filter = LinkFilter(
+    settings.LINK_FILTER_CAPACITY, settings.LINK_FILTER_ERROR_RATE,
+    settings.LINK_FILTER_LOOKBACK_SECONDS, open_link_repository,
+    subscriber=lambda callback: listen(engine, "links_created", callback),
+    reconnect_interval=settings.LINK_FILTER_RECONNECT_INTERVAL_SECONDS,
+    keepalive=settings.LINK_FILTER_KEEPALIVE_SECONDS
+) if settings.LINK_FILTER_ENABLED else None
+
+redirect_service = RedirectService(link_cache, click_queue, link_filter=link_filter)
@@ -0,0 +1,90 @@
+import asyncio
+import secrets
+import string
+from abc import ABC, abstractmethod
+from typing import List
+from src.core.config import settings
+from src.repositories.interfaces.links_repository import LinkRepositoryInterface
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+
+# Пути фиксированных маршрутов верхнего уровня: они регистрируются раньше /{short_url},
+# и ссылка с таким кодом никогда не дошла бы до редиректа
+RESERVED_SHORT_CODES = frozenset({"docs", "redoc", "health", "ready", "metrics", "links", "stats"})
+
+# Нечетный и не кратный 31 множитель: взаимно прост с 62^n, поэтому перемешивание обратимо
+_SCRAMBLE_MULTIPLIER = 25214903917
+
+
+def base62_encode(number: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        number, remainder = divmod(number, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+class ShortCodeGenerator(ABC):
+    @abstractmethod
+    async def generate(self, link_repository: LinkRepositoryInterface, count: int = 1) -> List[str]:
+        pass
+
+
+class RandomCodeGenerator(ShortCodeGenerator):
+    """Случайные base62-коды; коллизии обрабатываются повторной попыткой при создании."""
+
+    def __init__(self, length: int):
+        self.length = length
+
+    async def generate(self, link_repository: LinkRepositoryInterface, count: int = 1) -> List[str]:
+        codes = []
+        while len(codes) < count:
+            code = "".join(secrets.choice(BASE62_ALPHABET) for _ in range(self.length))
+            if code not in RESERVED_SHORT_CODES:
+                codes.append(code)
+        return codes
+
+
+class SequenceCodeGenerator(ShortCodeGenerator):
+    """Base62-коды из счетчика, блоки которого арендуются у последовательности в Postgres.
+
+    Каждый воркер выдает коды из своего блока без обращения к базе данных,
+    а номера переставляются умножением по модулю 62^length, чтобы соседние коды не были похожи.
+    """
+
+    def __init__(self, length: int, block_size: int):
+        self.length = length
+        self.block_size = block_size
+        self.capacity = 62 ** length
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    def _encode(self, number: int) -> str:
+        if number >= self.capacity:
+            raise ValueError("Short URL space exhausted")
+        return base62_encode(number * _SCRAMBLE_MULTIPLIER % self.capacity, self.length)
+
+    async def generate(self, link_repository: LinkRepositoryInterface, count: int = 1) -> List[str]:
+        codes = []
+        async with self._lock:
+            while len(codes) < count:
+                if self._next >= self._end:
+                    block = await link_repository.lease_code_block()
+                    self._next, self._end = block * self.block_size, (block + 1) * self.block_size
+                take = min(count - len(codes), self._end - self._next)
+                codes.extend(
+                    code for code in map(self._encode, range(self._next, self._next + take))
+                    if code not in RESERVED_SHORT_CODES
+                )
+                self._next += take
+        return codes
+
+
+def create_code_generator() -> ShortCodeGenerator:
+    if settings.SHORT_URL_GENERATOR == "random":
+        return RandomCodeGenerator(settings.SHORT_URL_LENGTH)
+    return SequenceCodeGenerator(settings.SHORT_URL_LENGTH, settings.SHORT_URL_BLOCK_SIZE)
+
+
+short_code_generator = create_code_generator()
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from src.core.config import settings
+from src.services.click_queue import ClickQueue, click_queue
+
+StatsLoader = Callable[[], Awaitable[List[dict]]]
+
+
+class StatsSnapshot:
+    """Статистика ссылок пользователя на момент построения и клики, записанные после него."""
+
+    def __init__(self, links: List[dict], ttl: float):
+        now = datetime.now()
+        self.links = {link["id"]: link for link in links}
+        self.expires_at = time.monotonic() + ttl
+        # Истечение срока ссылки меняет фильтр is_active, снимок до этого момента не доживает
+        self.valid_until = min(
+            (link["expires_at"] for link in links if link["expires_at"] is not None and link["expires_at"] > now),
+            default=None
+        )
+        self.version = 0
+        self._views: Dict[Tuple[Optional[bool], Optional[int]], Tuple[int, List[dict], str]] = {}
+
+    @property
+    def fresh(self) -> bool:
+        if time.monotonic() >= self.expires_at:
+            return False
+        return self.valid_until is None or datetime.now() < self.valid_until
+
+    def add_click(self, link_id: int, clicked_at: datetime, hour_ago: datetime) -> None:
+        link = self.links[link_id]
+        link["last_day_clicks"] += 1
+        if clicked_at >= hour_ago:
+            link["last_hour_clicks"] += 1
+        self.version += 1
+
+    def view(self, is_active: Optional[bool], limit: Optional[int]) -> Tuple[List[dict], str]:
+        """Отфильтрованные и отсортированные ссылки с ETag; пересчитываются только после новых кликов."""
+        key = (is_active, limit)
+        cached = self._views.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1], cached[2]
+        now = datetime.now()
+        links = [
+            link for link in self.links.values()
+            if is_active is None
+            or (link["is_active"] and (link["expires_at"] is None or link["expires_at"] >= now)) == is_active
+        ]
+        links.sort(key=lambda link: (-link["last_day_clicks"], -link["last_hour_clicks"], link["id"]))
+        if limit is not None:
+            links = links[:limit]
+        rows = [
+            {
+                "short_url": link["short_url"],
+                "original_url": link["original_url"],
+                "last_hour_clicks": link["last_hour_clicks"],
+                "last_day_clicks": link["last_day_clicks"],
+            }
+            for link in links
+        ]
+        etag = stats_etag(rows)
+        self._views[key] = (self.version, rows, etag)
+        return rows, etag
+
+
+def stats_etag(rows: List[dict]) -> str:
+    """ETag по содержимому: одинаковая статистика дает один тег в любом воркере."""
+    payload = json.dumps(
+        [[row["short_url"], row["last_hour_clicks"], row["last_day_clicks"]] for row in rows]
+    ).encode()
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+class UserBuild:
+    """Построение снимка, общее для одновременных запросов пользователя; живет, пока его ждут."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        # Растет при инвалидации; снимок, начатый в другом поколении, не сохраняется
+        self.generation = 0
+
+
+class StatsSnapshots:
+    """Снимки статистики пользователей в памяти процесса.
+
+    Снимок строится запросом к базе не чаще раза в ttl и между построениями
+    дополняется кликами, которые записала очередь этого процесса. Клики других
+    воркеров и выход старых кликов из окна учитываются при следующем построении.
+    """
+
+    def __init__(self, ttl: float, max_users: int, click_queue: Optional[ClickQueue] = None):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.click_queue = click_queue
+        self.hits = 0
+        self.misses = 0
+        self._snapshots: "OrderedDict[int, StatsSnapshot]" = OrderedDict()
+        self._owners: Dict[int, int] = {}
+        self._builds: Dict[int, UserBuild] = {}
+        if click_queue is not None:
+            click_queue.add_listener(self.record_clicks)
+
+    def _fresh(self, user_id: int) -> Optional[StatsSnapshot]:
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None or not snapshot.fresh:
+            return None
+        self._snapshots.move_to_end(user_id)
+        return snapshot
+
+    async def get(self, user_id: int, loader: StatsLoader) -> StatsSnapshot:
+        snapshot = self._fresh(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        # Одновременные запросы одного пользователя ждут одно построение
+        build = self._builds.get(user_id)
+        if build is None:
+            build = self._builds[user_id] = UserBuild()
+        build.waiting += 1
+        try:
+            async with build.lock:
+                snapshot = self._fresh(user_id)
+                if snapshot is None:
+                    snapshot = await self._build(user_id, build, loader)
+        finally:
+            build.waiting -= 1
+            if not build.waiting:
+                del self._builds[user_id]
+        return snapshot
+
+    async def _build(self, user_id: int, build: UserBuild, loader: StatsLoader) -> StatsSnapshot:
+        generation = build.generation
+        # Пока идет запрос к основной базе, пакеты кликов не фиксируются: каждый пакет либо
+        # уже виден запросу, либо придет подписчику после сохранения снимка, и ни один не
+        # учитывается дважды
+        fence = self.click_queue.holding_writes() if self.click_queue is not None else nullcontext()
+        async with fence:
+            snapshot = StatsSnapshot(await loader(), self.ttl)
+            # Снимок, построенный до инвалидации, отдается текущему запросу, но не сохраняется
+            if build.generation == generation:
+                self._discard(user_id)
+                self._snapshots[user_id] = snapshot
+                for link_id in snapshot.links:
+                    self._owners[link_id] = user_id
+                while len(self._snapshots) > self.max_users:
+                    self._discard(next(iter(self._snapshots)))
+        return snapshot
+
+    def _discard(self, user_id: int) -> None:
+        snapshot = self._snapshots.pop(user_id, None)
+        if snapshot is not None:
+            for link_id in snapshot.links:
+                self._owners.pop(link_id, None)
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбрасывает снимок после создания или деактивации ссылок пользователя."""
+        build = self._builds.get(user_id)
+        if build is not None:
+            build.generation += 1
+        self._discard(user_id)
+
+    def record_clicks(self, clicks: List[Tuple[int, datetime]]) -> None:
+        """Добавляет записанные клики в снимки; стоимость пропорциональна числу кликов."""
+        if not self._owners:
+            return
+        hour_ago = datetime.now() - timedelta(hours=1)
+        for link_id, clicked_at in clicks:
+            user_id = self._owners.get(link_id)
+            if user_id is not None:
+                self._snapshots[user_id].add_click(link_id, clicked_at, hour_ago)
+
+    def stats(self) -> dict:
+        return {"size": len(self._snapshots), "hits": self.hits, "misses": self.misses}
+
+
+stats_snapshots = StatsSnapshots(
+    settings.STATS_SNAPSHOT_TTL_SECONDS, settings.STATS_SNAPSHOT_MAX_USERS, click_queue
+) if settings.STATS_SNAPSHOTS_ENABLED else None
@@ -0,0 +1,47 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenService:
+    """Выпуск и проверка подписанных HMAC токенов доступа без обращения к базе данных."""
+
+    def __init__(self, secret_key: str, ttl_seconds: int):
+        self.secret_key = secret_key.encode()
+        self.ttl_seconds = ttl_seconds
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret_key, payload.encode(), hashlib.sha256).digest())
+
+    def create_access_token(self, user: dict) -> dict:
+        claims = {"sub": user["id"], "username": user["username"], "exp": int(time.time()) + self.ttl_seconds}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return {
+            "access_token": f"{payload}.{self._sign(payload)}",
+            "token_type": "bearer",
+            "expires_in": self.ttl_seconds,
+        }
+
+    def verify_access_token(self, token: str) -> dict:
+        try:
+            payload, signature = token.split(".")
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                raise ValueError
+            claims = json.loads(_b64decode(payload))
+            user = {"id": int(claims["sub"]), "username": str(claims["username"])}
+            expires_at = int(claims["exp"])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Invalid token")
+        if expires_at < time.time():
+            raise ValueError("Token has expired")
+        return user
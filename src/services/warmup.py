@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.cache import link_cache
+from src.cache.base import CacheBackend
+from src.core.config import settings
+from src.db.database import engine, replica_router
+from src.services.link_filter import RepositoryFactory
+from src.services.links_service import cache_link
+from src.services.redirect_service import open_link_repository
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Готовность процесса принимать трафик: после прогрева и до начала остановки."""
+
+    def __init__(self):
+        self.ready = False
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> None:
+    """Открывает соединения заранее, чтобы первые запросы не ждали подключения к базе.
+
+    Соединения берутся одновременно, иначе пул отдавал бы одно и то же.
+    """
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def warm_up_link_cache(
+    link_cache: CacheBackend, repository_factory: RepositoryFactory, since: datetime, limit: int
+) -> int:
+    """Загружает в кэш самые посещаемые с момента since ссылки."""
+    async with repository_factory(True) as repository:
+        links = await repository.get_hot_links(since, limit)
+    for link in links:
+        await cache_link(link_cache, link["short_url"], link)
+    return len(links)
+
+
+async def warm_up() -> None:
+    """Прогрев при старте; ошибки не мешают запуску, первые запросы просто будут медленнее."""
+    connections = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(warm_up_pool(bind, connections) for bind in [engine, *replica_router.replicas])),
+            settings.WARMUP_TIMEOUT_SECONDS
+        )
+    except Exception:
+        logger.exception("Failed to warm up database pool")
+    if settings.WARMUP_HOT_LINKS:
+        since = datetime.now() - timedelta(seconds=settings.WARMUP_HOT_LINKS_WINDOW_SECONDS)
+        try:
+            count = await asyncio.wait_for(
+                warm_up_link_cache(link_cache, open_link_repository, since, settings.WARMUP_HOT_LINKS),
+                settings.WARMUP_TIMEOUT_SECONDS
+            )
+            logger.info("Link cache warmed up with %d links", count)
+        except Exception:
+            logger.exception("Failed to warm up link cache")
+
+
+readiness = Readiness()
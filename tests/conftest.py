@@ -0,0 +1,19 @@
+import os
+import pytest
+
+# Настройки читаются при импорте src; для тестов без базы хватает заглушек
+for name, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "MODE": "TEST",
+    "SECRET_KEY": "test-secret-key-0123456789abcdefghij",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
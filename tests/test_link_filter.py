@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+import pytest
+
+from src.services.link_filter import LinkFilter
+
+
+class Codes:
+    """Коды в базе: отдает их так же, как repository.stream_short_urls."""
+
+    def __init__(self, *short_urls):
+        self.short_urls = list(short_urls)
+
+    async def estimate_link_count(self):
+        return len(self.short_urls)
+
+    async def stream_short_urls(self, since, batch_size):
+        yield [(short_url, datetime.now()) for short_url in self.short_urls]
+
+    @asynccontextmanager
+    async def factory(self, read_only):
+        yield self
+
+
+class Channel:
+    """Подписка, которую тест может оборвать."""
+
+    def __init__(self):
+        self.callback = None
+        self.subscribed = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    async def wait_closed(self, keepalive):
+        await self.closed.wait()
+
+    @asynccontextmanager
+    async def subscribe(self, callback):
+        self.callback = callback
+        self.closed.clear()
+        self.subscribed.set()
+        yield self
+        self.subscribed.clear()
+
+
+@pytest.fixture
+async def link_filter():
+    codes, channel = Codes("abc"), Channel()
+    link_filter = LinkFilter(100, 0.01, 60, codes.factory, subscriber=channel.subscribe, reconnect_interval=0.01)
+    await link_filter.load()
+    link_filter.start()
+    await channel.subscribed.wait()
+    await asyncio.sleep(0)
+    yield link_filter, codes, channel
+    await link_filter.stop()
+
+
+@pytest.mark.anyio
+async def test_rejects_only_while_subscribed(link_filter):
+    link_filter, codes, channel = link_filter
+    assert link_filter.synced
+    assert await link_filter.might_exist("abc")
+    assert not await link_filter.might_exist("xyz")
+
+    channel.closed.set()
+    await asyncio.sleep(0)
+    assert await link_filter.might_exist("xyz")
+
+
+@pytest.mark.anyio
+async def test_codes_from_other_workers_arrive_by_notification(link_filter):
+    link_filter, codes, channel = link_filter
+    channel.callback("def,ghi")
+    assert await link_filter.might_exist("def")
+    assert await link_filter.might_exist("ghi")
+
+
+@pytest.mark.anyio
+async def test_resubscribe_catches_up_missed_codes(link_filter):
+    link_filter, codes, channel = link_filter
+    channel.closed.set()
+    codes.short_urls.append("new")
+    await asyncio.sleep(0.05)
+    assert link_filter.synced
+    assert await link_filter.might_exist("new")
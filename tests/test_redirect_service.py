@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+import pytest
+
+from src.cache.memory import MemoryCache
+from src.services.links_service import LINK_EXPIRED, LinkService
+from src.services.redirect_service import RedirectService
+
+LINK = {"id": 1, "original_url": "https://example.com", "is_active": True, "redirect_type": 307}
+
+
+@pytest.fixture
+async def link_cache():
+    return MemoryCache(100, 60)
+
+
+@pytest.mark.anyio
+async def test_link_without_expiry_never_expires(link_cache):
+    await link_cache.set("abc", {**LINK, "expires_at": None})
+    link, error = await RedirectService(link_cache, None).resolve("abc")
+    assert error is None and link["id"] == 1
+    assert (await LinkService(None, link_cache).get_by_short_url_public("abc"))["id"] == 1
+
+
+@pytest.mark.anyio
+async def test_expired_link_is_rejected(link_cache):
+    await link_cache.set("abc", {**LINK, "expires_at": datetime.now() - timedelta(minutes=1)})
+    link, error = await RedirectService(link_cache, None).resolve("abc")
+    assert link is None and error == LINK_EXPIRED
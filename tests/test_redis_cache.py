@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.cache.redis import RedisCache  # noqa: E402
+
+LINK = {"id": 1, "original_url": "https://example.com", "is_active": True}
+
+
+@pytest.fixture
+async def workers():
+    """Два воркера с общим Redis и собственными локальными кэшами."""
+    server = fakeredis.FakeServer()
+    caches = [
+        RedisCache("links", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), 100, 60, 60)
+        for _ in range(2)
+    ]
+    for cache in caches:
+        await cache.start()
+    await asyncio.sleep(0.05)
+    yield caches
+    for cache in caches:
+        await cache.close()
+
+
+@pytest.mark.anyio
+async def test_delete_invalidates_local_copies(workers):
+    first, second = workers
+    await first.set("abc", LINK)
+    assert await second.get("abc") == LINK
+
+    await first.delete("abc")
+    await asyncio.sleep(0.05)
+
+    assert await first.get("abc") is None
+    assert await second.get("abc") is None
+
+
+@pytest.mark.anyio
+async def test_stale_set_after_delete_is_dropped(workers):
+    first, second = workers
+    # Промах и чтение из базы до деактивации, запись в кэш после нее
+    assert await first.get("abc") is None
+    await second.delete("abc")
+    await first.set("abc", LINK)
+    await asyncio.sleep(0.05)
+
+    assert await first.get("abc") is None
+    assert await second.get("abc") is None
+
+
+@pytest.mark.anyio
+async def test_set_after_miss_without_delete_is_stored(workers):
+    first, second = workers
+    assert await first.get("abc") is None
+    await first.set("abc", LINK)
+
+    assert await second.get("abc") == LINK
@@ -0,0 +1,27 @@
+import pytest
+
+from src.server import build_config
+
+
+async def client_host(config, peer: str, forwarded_for: str) -> str:
+    """Адрес клиента, который увидит приложение за ProxyHeadersMiddleware из конфигурации."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["client"] = scope["client"][0]
+
+    config.app = app
+    config.load()
+    scope = {
+        "type": "http", "scheme": "http", "client": (peer, 1234),
+        "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+    }
+    await config.loaded_app(scope, None, None)
+    return seen["client"]
+
+
+@pytest.mark.anyio
+async def test_forwarded_for_is_trusted_only_from_allowed_proxies(monkeypatch):
+    monkeypatch.setattr("src.server.settings.SERVER_FORWARDED_ALLOW_IPS", "10.0.0.0/8")
+    assert await client_host(build_config(), "10.1.2.3", "203.0.113.7") == "203.0.113.7"
+    assert await client_host(build_config(), "198.51.100.1", "203.0.113.7") == "198.51.100.1"
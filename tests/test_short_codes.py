@@ -0,0 +1,45 @@
+import pytest
+
+from src.services.short_codes import (
+    BASE62_ALPHABET, RESERVED_SHORT_CODES, _SCRAMBLE_MULTIPLIER, RandomCodeGenerator, SequenceCodeGenerator
+)
+
+
+def test_fixed_top_level_paths_are_reserved():
+    from src.main import app
+
+    paths = {route.path.strip("/") for route in app.routes}
+    shadowing = {
+        path for path in paths
+        if path and "/" not in path and "{" not in path and all(char in BASE62_ALPHABET for char in path)
+    }
+    assert shadowing <= RESERVED_SHORT_CODES
+
+
+class Blocks:
+    def __init__(self, *blocks: int):
+        self.blocks = iter(blocks)
+
+    async def lease_code_block(self) -> int:
+        return next(self.blocks)
+
+
+@pytest.mark.anyio
+async def test_sequence_generator_skips_reserved_codes():
+    generator = SequenceCodeGenerator(6, 2)
+    capacity = 62 ** 6
+    encoded = 0
+    for char in "health":
+        encoded = encoded * 62 + BASE62_ALPHABET.index(char)
+    number = encoded * pow(_SCRAMBLE_MULTIPLIER, -1, capacity) % capacity
+    assert generator._encode(number) == "health"
+
+    codes = await generator.generate(Blocks(number // 2, number // 2 + 1), 2)
+    assert "health" not in codes and len(set(codes)) == 2
+
+
+@pytest.mark.anyio
+async def test_random_generator_retries_reserved_codes(monkeypatch):
+    chars = iter("ready" + "abcde")
+    monkeypatch.setattr("src.services.short_codes.secrets.choice", lambda alphabet: next(chars))
+    assert await RandomCodeGenerator(5).generate(None) == ["abcde"]
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+
+from src.services.click_queue import ClickQueue
+from src.services.stats_snapshots import StatsSnapshots
+
+
+class Database:
+    """Клики, зафиксированные очередью; между фиксацией и уведомлением подписчиков есть пауза."""
+
+    def __init__(self):
+        self.clicks = 0
+        self.committed = asyncio.Event()
+
+    def session(self):
+        return Session(self)
+
+    async def load(self, delay: float = 0, link_id: int = 1):
+        await asyncio.sleep(delay)
+        return [{
+            "id": link_id, "short_url": "abc", "original_url": "https://example.com", "is_active": True,
+            "expires_at": None, "last_hour_clicks": self.clicks, "last_day_clicks": self.clicks,
+        }]
+
+
+class Session:
+    def __init__(self, database: Database):
+        self.database = database
+        self.pending = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await asyncio.sleep(0.01)
+
+    async def execute(self, statement, params=None):
+        if self.pending == 0 and params is not None:
+            self.pending = len(params)
+
+    async def commit(self):
+        self.database.clicks += self.pending
+        self.database.committed.set()
+
+
+@pytest.fixture
+def stats():
+    database = Database()
+    queue = ClickQueue(database.session, batch_size=100, flush_interval=1, max_size=100)
+    return database, queue, StatsSnapshots(60, 10, queue)
+
+
+@pytest.mark.anyio
+async def test_click_committed_before_build_is_counted_once(stats):
+    database, queue, snapshots = stats
+    queue.put(1)
+    flush = asyncio.create_task(queue.flush())
+    await database.committed.wait()
+
+    snapshot = await snapshots.get(1, database.load)
+    await flush
+    assert snapshot.links[1]["last_day_clicks"] == 1
+
+
+@pytest.mark.anyio
+async def test_click_after_build_is_added(stats):
+    database, queue, snapshots = stats
+    snapshot = await snapshots.get(1, database.load)
+    queue.put(1)
+    await queue.flush()
+    assert snapshot.links[1]["last_day_clicks"] == 1
+
+
+@pytest.mark.anyio
+async def test_view_treats_missing_expiry_as_active(stats):
+    database, queue, snapshots = stats
+    snapshot = await snapshots.get(1, database.load)
+    assert [row["short_url"] for row in snapshot.view(True, None)[0]] == ["abc"]
+    assert snapshot.view(False, None)[0] == []
+
+
+@pytest.mark.anyio
+async def test_builds_are_forgotten_after_completion(stats):
+    database, queue, snapshots = stats
+
+    async def invalidated_load():
+        snapshots.invalidate(1)
+        return await database.load()
+
+    await snapshots.get(1, invalidated_load)
+    assert snapshots.stats()["size"] == 0
+    await snapshots.get(1, database.load)
+    snapshots.invalidate(2)
+    assert snapshots.stats()["size"] == 1
+    assert not snapshots._builds
+
+
+@pytest.mark.anyio
+async def test_overlapping_builds_do_not_block_click_writes(stats):
+    database, queue, snapshots = stats
+
+    async def build_forever(user_id: int, delay: float):
+        while True:
+            snapshots.invalidate(user_id)
+            await snapshots.get(user_id, lambda: database.load(delay, user_id))
+
+    builders = [asyncio.create_task(build_forever(user_id, 0.005 * user_id)) for user_id in range(1, 4)]
+    try:
+        await asyncio.sleep(0.02)
+        for _ in range(5):
+            queue.put(1)
+            await asyncio.wait_for(queue.flush(), 1)
+        assert database.clicks == 5
+        assert queue.size == 0 and queue.dropped == 0
+    finally:
+        for builder in builders:
+            builder.cancel()
+        await asyncio.gather(*builders, return_exceptions=True)
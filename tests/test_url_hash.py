@@ -0,0 +1,11 @@
+from src.services.links_service import hash_url, normalize_url
+
+
+def test_normalize_keeps_fragment():
+    assert normalize_url("HTTPS://Example.com:443/app#/page-b") == "https://example.com/app#/page-b"
+    assert hash_url("https://example.com/app#/page-a") != hash_url("https://example.com/app#/page-b")
+
+
+def test_hash_depends_on_redirect_type():
+    assert hash_url("https://example.com/", 307) == hash_url("HTTPS://EXAMPLE.com")
+    assert hash_url("https://example.com/", 301) != hash_url("https://example.com/", 307)